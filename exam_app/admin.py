@@ -1,12 +1,13 @@
 from django.contrib import admin, messages
-from .models import Exam, Question, Attempt, StudentProfile
+from .models import Exam, Question, Attempt, GradingJob, Response, StudentProfile
 
 @admin.register(StudentProfile)
 class StudentProfileAdmin(admin.ModelAdmin):
     list_display = ('user',)
 from django import forms
-import pandas as pd
-import io
+from django.db.models.expressions import RawSQL
+from .importers import import_questions
+from .search import fts_query, matching_ids, search_available
 
 class ExamAdminForm(forms.ModelForm):
     question_file = forms.FileField(
@@ -36,27 +37,17 @@ class ExamAdmin(admin.ModelAdmin):
         file = request.FILES.get('question_file')
         if file:
             try:
-                if file.name.endswith('.csv'):
-                    df = pd.read_csv(file)
-                else:
-                    df = pd.read_excel(file)
-                
-                # Required columns match the previous logic
-                created_count = 0
-                for _, row in df.iterrows():
-                    Question.objects.create(
-                        exam=obj,
-                        text=row['text'],
-                        option1=row['option1'],
-                        option2=row['option2'],
-                        option3=row['option3'],
-                        option4=row['option4'],
-                        correct_answer=int(row['correct_answer']),
-                        marks=int(row.get('marks', 1))
-                    )
-                    created_count += 1
-                
-                self.message_user(request, f"Successfully imported {created_count} questions from the file.", messages.SUCCESS)
+                report = import_questions(obj, file)
+                self.message_user(
+                    request,
+                    f"Successfully imported {report.created} questions from the file "
+                    f"({report.rows_per_second:.0f} rows/sec).",
+                    messages.SUCCESS
+                )
+                for row, error in report.errors[:20]:
+                    self.message_user(request, f"Row {row} skipped: {error}", messages.WARNING)
+                if len(report.errors) > 20:
+                    self.message_user(request, f"...and {len(report.errors) - 20} more skipped rows.", messages.WARNING)
             except Exception as e:
                 self.message_user(request, f"Error importing questions: {str(e)}", messages.ERROR)
 
@@ -64,8 +55,26 @@ class ExamAdmin(admin.ModelAdmin):
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ('text', 'exam', 'correct_answer', 'marks')
     list_filter = ('exam',)
+    search_fields = ('text',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of LIKE scans where it exists.
+        if search_available() and fts_query(search_term):
+            return queryset.filter(id__in=RawSQL(*matching_ids(search_term))), False
+        return super().get_search_results(request, queryset, search_term)
 
 @admin.register(Attempt)
 class AttemptAdmin(admin.ModelAdmin):
     list_display = ('user', 'exam', 'score', 'started_at', 'is_submitted')
     list_filter = ('exam', 'user', 'is_submitted')
+
+@admin.register(Response)
+class ResponseAdmin(admin.ModelAdmin):
+    list_display = ('attempt', 'question', 'selected_option', 'updated_at')
+    raw_id_fields = ('attempt', 'question')
+
+@admin.register(GradingJob)
+class GradingJobAdmin(admin.ModelAdmin):
+    list_display = ('attempt', 'status', 'submitted_at', 'finished_at')
+    list_filter = ('status',)
+    raw_id_fields = ('attempt',)
@@ -0,0 +1,98 @@
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+ADMISSION_SALT = 'exam-admission'
+# An admitted ticket must be used within this many seconds of its slot.
+TICKET_TTL = 300
+
+
+def admission_enabled():
+    return bool(getattr(settings, 'EXAM_ADMISSION_RATE', None))
+
+
+def _slot_key(exam_id):
+    return f'admission:{exam_id}:slot'
+
+
+def _next_slot(exam_id, now):
+    """Hand out the next start slot for an exam, first come first served.
+
+    Slot ``n`` opens at ``n / EXAM_ADMISSION_RATE`` seconds. The counter
+    never lags more than ``EXAM_ADMISSION_BURST`` slots behind the clock,
+    so a quiet exam admits a burst at once and a crowd is then let in at
+    the steady rate.
+    """
+    rate = settings.EXAM_ADMISSION_RATE
+    floor = int(now * rate) - settings.EXAM_ADMISSION_BURST
+    key = _slot_key(exam_id)
+    cache.add(key, floor, None)
+    try:
+        slot = cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr.
+        slot = None
+    if slot is None or slot <= floor:
+        # Capacity unused while the exam was quiet is not carried over. A
+        # racing request may reset the counter too, admitting a few extra.
+        slot = floor + 1
+        cache.set(key, slot, None)
+    return slot
+
+
+def make_ticket(user_id, exam_id, due):
+    return signing.dumps([user_id, exam_id, round(due, 3)], salt=ADMISSION_SALT)
+
+
+def read_ticket(token):
+    """Return ``(user_id, exam_id, due)`` or raise ``signing.BadSignature``."""
+    try:
+        user_id, exam_id, due = signing.loads(token, salt=ADMISSION_SALT)
+    except (TypeError, ValueError):
+        raise signing.BadSignature('Malformed admission ticket.')
+    return user_id, exam_id, due
+
+
+def seconds_to_wait(due, now=None):
+    now = time.time() if now is None else now
+    return max(0.0, due - now)
+
+
+def _ticket_key(user_id, exam_id):
+    return f'admission:{exam_id}:ticket:{user_id}'
+
+
+def _remaining_wait(token, user_id, exam_id, now):
+    """Seconds until ``token`` admits this student, or None if it cannot be used."""
+    try:
+        ticket_user, ticket_exam, due = read_ticket(token)
+    except signing.BadSignature:
+        return None
+    if (ticket_user, ticket_exam) != (user_id, exam_id) or now > due + TICKET_TTL:
+        return None
+    return seconds_to_wait(due, now)
+
+
+def admission_ticket(user_id, exam_id, token=None, now=None):
+    """Return ``(token, wait)`` for a student about to start ``exam_id``.
+
+    A ticket from an earlier visit keeps the student's place in the queue,
+    whether the client sends it back or just reloads the page; otherwise
+    the next slot is taken. ``wait`` is 0 once the slot is open.
+    """
+    now = time.time() if now is None else now
+    key = _ticket_key(user_id, exam_id)
+    wait = _remaining_wait(token, user_id, exam_id, now) if token else None
+    if wait is None:
+        token = cache.get(key)
+        wait = _remaining_wait(token, user_id, exam_id, now) if token else None
+    if wait is None:
+        due = _next_slot(exam_id, now) / settings.EXAM_ADMISSION_RATE
+        token, wait = make_ticket(user_id, exam_id, due), seconds_to_wait(due, now)
+        cache.set(key, token, wait + TICKET_TTL)
+    if not wait:
+        # Admitted, so a later start queues afresh.
+        cache.delete(key)
+    return token, wait
@@ -0,0 +1,257 @@
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connections
+from django.db.models.functions import Coalesce
+
+from .caching import exam_cache_key, versioned_timeout
+from .models import Attempt, Question, Response
+from .scoring import unpack_question_ids
+
+# Grading transactions can commit out of graded_at order, so each refresh
+# re-reads this window before the last grading time it has seen.
+ANALYSIS_OVERLAP = timedelta(hours=1)
+FETCH_SIZE = 50000
+# Items below this corrected point-biserial are flagged for review.
+LOW_DISCRIMINATION = 0.2
+
+
+@dataclass
+class ItemStatistics:
+    """Sufficient statistics of an exam's attempts × questions response matrix.
+
+    Everything is a sum over attempts, so statistics for new attempts can be
+    added to cached ones without re-reading old responses. Attempts that drew
+    a sample of the questions only count towards the items they were shown.
+    """
+    question_ids: np.ndarray
+    correct_options: np.ndarray
+    marks: np.ndarray
+    attempts: int = 0
+    total_sum: float = 0.0
+    total_sq_sum: float = 0.0
+    correct: np.ndarray = None
+    correct_total: np.ndarray = None
+    options: np.ndarray = None
+    exposures: np.ndarray = None
+    exposed_total: np.ndarray = None
+    exposed_total_sq: np.ndarray = None
+    watermark: object = None
+    recent: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        k = len(self.question_ids)
+        if self.correct is None:
+            self.correct = np.zeros(k)
+            self.correct_total = np.zeros(k)
+            # Column 0 counts answers that were saved and then cleared.
+            self.options = np.zeros((k, 5), dtype=np.int64)
+            # Attempts shown each item, and the sums of their totals.
+            self.exposures = np.zeros(k)
+            self.exposed_total = np.zeros(k)
+            self.exposed_total_sq = np.zeros(k)
+
+    def _positions(self, question_ids):
+        """Indexes of ``question_ids`` in this exam and which of them are still in it."""
+        q = np.searchsorted(self.question_ids, question_ids)
+        valid = q < len(self.question_ids)
+        valid[valid] &= self.question_ids[q[valid]] == question_ids[valid]
+        return q, valid
+
+    def add(self, attempt_ids, responses, question_sets=None):
+        """Fold in attempts and their ``(attempt_id, question_id, option)`` rows.
+
+        ``question_sets`` maps the ids of attempts that drew a sample of the
+        questions to their ``Attempt.question_set``.
+        """
+        attempt_ids = np.sort(attempt_ids)
+        if len(responses):
+            a = np.searchsorted(attempt_ids, responses[:, 0])
+            q, valid = self._positions(responses[:, 1])
+            option = responses[:, 2]
+            valid &= (option >= 0) & (option <= 4)
+            a, q, option = a[valid], q[valid], option[valid]
+        else:
+            a = q = option = np.empty(0, dtype=np.int64)
+
+        is_correct = (option == self.correct_options[q]).astype(float)
+        totals = np.bincount(a, weights=is_correct * self.marks[q], minlength=len(attempt_ids))
+        k = len(self.question_ids)
+        self.attempts += len(attempt_ids)
+        self.total_sum += totals.sum()
+        self.total_sq_sum += (totals ** 2).sum()
+        self.correct += np.bincount(q, weights=is_correct, minlength=k)
+        self.correct_total += np.bincount(q, weights=is_correct * totals[a], minlength=k)
+        self.options += np.bincount(q * 5 + option, minlength=k * 5).reshape(k, 5)
+
+        shown_all = np.ones(len(attempt_ids), dtype=bool)
+        if question_sets:
+            sampled = np.searchsorted(attempt_ids, np.fromiter(question_sets, dtype=np.int64))
+            shown_all[sampled] = False
+            drawn = [unpack_question_ids(question_set) for question_set in question_sets.values()]
+            a = np.repeat(sampled, [len(ids) for ids in drawn])
+            q, valid = self._positions(np.array([i for ids in drawn for i in ids], dtype=np.int64))
+            a, q = a[valid], q[valid]
+            self.exposures += np.bincount(q, minlength=k)
+            self.exposed_total += np.bincount(q, weights=totals[a], minlength=k)
+            self.exposed_total_sq += np.bincount(q, weights=totals[a] ** 2, minlength=k)
+        self.exposures += shown_all.sum()
+        self.exposed_total += totals[shown_all].sum()
+        self.exposed_total_sq += (totals[shown_all] ** 2).sum()
+
+    @property
+    def difficulty(self):
+        """Proportion of the attempts shown each item that answered it correctly."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.exposures > 0, self.correct / self.exposures, np.nan)
+
+    @property
+    def total_variance(self):
+        if not self.attempts:
+            return np.nan
+        mean = self.total_sum / self.attempts
+        return self.total_sq_sum / self.attempts - mean ** 2
+
+    @property
+    def discrimination(self):
+        """Point-biserial correlation of each item with the rest of the test."""
+        n = np.maximum(self.exposures, 1)
+        p = self.difficulty
+        item_var = p * (1 - p)
+        # Totals of the attempts that were shown the item.
+        mean_total = self.exposed_total / n
+        total_var = self.exposed_total_sq / n - mean_total ** 2
+        cov_total = self.correct_total / n - p * mean_total
+        # Remove the item's own marks from the total before correlating.
+        cov_rest = cov_total - self.marks * item_var
+        rest_var = total_var - 2 * self.marks * cov_total + self.marks ** 2 * item_var
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = cov_rest / np.sqrt(item_var * rest_var)
+        return np.where(np.isfinite(r), r, np.nan)
+
+    @property
+    def alpha(self):
+        """Cronbach's alpha of the item scores, when every attempt saw every item."""
+        k = len(self.question_ids)
+        total_var = self.total_variance
+        if k < 2 or not total_var or np.isnan(total_var) or (self.exposures != self.attempts).any():
+            return None
+        p = self.difficulty
+        item_var = (self.marks ** 2 * p * (1 - p)).sum()
+        return float(k / (k - 1) * (1 - item_var / total_var))
+
+    @property
+    def unanswered(self):
+        return self.exposures - self.options[:, 1:].sum(axis=1)
+
+
+def _fetch_array(queryset, width):
+    """Read a values_list queryset of integers straight into an array."""
+    sql, params = queryset.query.sql_with_params()
+    chunks = []
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(FETCH_SIZE):
+            chunks.append(np.array(rows, dtype=np.int64))
+    return np.concatenate(chunks) if chunks else np.empty((0, width), dtype=np.int64)
+
+
+def _new_attempts(exam_id, stats):
+    attempts = Attempt.objects.filter(exam_id=exam_id, is_submitted=True)
+    since = None
+    if stats.watermark is not None:
+        since = stats.watermark - ANALYSIS_OVERLAP
+        attempts = attempts.filter(graded_at__gte=since)
+    rows = [
+        row
+        for row in attempts.values_list('id', 'graded_at', 'question_set').iterator(chunk_size=FETCH_SIZE)
+        if row[0] not in stats.recent
+    ]
+    return rows, since
+
+
+def refresh_statistics(exam_id, stats):
+    """Add attempts graded since ``stats`` was built."""
+    rows, since = _new_attempts(exam_id, stats)
+    if not rows:
+        return stats
+    attempt_ids = np.array([attempt_id for attempt_id, _, _ in rows], dtype=np.int64)
+    question_sets = {
+        attempt_id: question_set for attempt_id, _, question_set in rows if question_set is not None
+    }
+
+    responses = Response.objects.filter(
+        attempt__exam_id=exam_id, attempt__is_submitted=True
+    )
+    if since is not None:
+        responses = responses.filter(attempt__graded_at__gte=since)
+    responses = _fetch_array(
+        responses.annotate(option=Coalesce('selected_option', 0)).values_list('attempt_id', 'question_id', 'option'),
+        width=3,
+    )
+    responses = responses[np.isin(responses[:, 0], attempt_ids)]
+    stats.add(attempt_ids, responses, question_sets)
+
+    latest = max((graded_at for _, graded_at, _ in rows if graded_at is not None), default=None)
+    if latest is not None and (stats.watermark is None or latest > stats.watermark):
+        stats.watermark = latest
+    if stats.watermark is not None:
+        cutoff = stats.watermark - ANALYSIS_OVERLAP
+        recent = [*stats.recent.items(), *((attempt_id, graded_at) for attempt_id, graded_at, _ in rows)]
+        stats.recent = {
+            attempt_id: graded_at for attempt_id, graded_at in recent
+            if graded_at is not None and graded_at >= cutoff
+        }
+    return stats
+
+
+def item_statistics(exam_id):
+    """Return up-to-date :class:`ItemStatistics` for an exam.
+
+    Cached per exam version: editing the questions starts over, while new
+    attempts are folded into the cached sums.
+    """
+    key = exam_cache_key(exam_id, 'item_statistics')
+    stats = cache.get(key)
+    if stats is None:
+        questions = _fetch_array(
+            Question.objects.filter(exam_id=exam_id).order_by('id').values_list('id', 'correct_answer', 'marks'),
+            width=3,
+        )
+        stats = ItemStatistics(
+            question_ids=questions[:, 0],
+            correct_options=questions[:, 1],
+            marks=questions[:, 2].astype(float),
+        )
+    refresh_statistics(exam_id, stats)
+    cache.set(key, stats, versioned_timeout())
+    return stats
+
+
+def item_analysis(exam_id):
+    """Per-question difficulty, discrimination and option counts for an exam."""
+    stats = item_statistics(exam_id)
+    difficulty = stats.difficulty
+    discrimination = stats.discrimination
+    unanswered = stats.unanswered
+    items = []
+    for index, question_id in enumerate(stats.question_ids.tolist()):
+        d = discrimination[index]
+        items.append({
+            'question_id': question_id,
+            'correct_answer': int(stats.correct_options[index]),
+            'difficulty': None if np.isnan(difficulty[index]) else float(difficulty[index]),
+            'discrimination': None if np.isnan(d) else float(d),
+            'flagged': not np.isnan(d) and d < LOW_DISCRIMINATION,
+            'options': stats.options[index, 1:].tolist(),
+            'shown': int(stats.exposures[index]),
+            'unanswered': int(unanswered[index]),
+        })
+    return {
+        'attempts': stats.attempts,
+        'mean_score': stats.total_sum / stats.attempts if stats.attempts else None,
+        'alpha': stats.alpha,
+        'items': items,
+    }
@@ -3,3 +3,15 @@ from django.apps import AppConfig
 class ExamAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'exam_app'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .db import configure_sqlite_connection
+        from .metrics import install_query_recorder
+
+        connection_created.connect(install_query_recorder, dispatch_uid='exam_app_query_metrics')
+        if getattr(settings, 'SQLITE_PRODUCTION_MODE', False):
+            connection_created.connect(configure_sqlite_connection, dispatch_uid='exam_app_sqlite_pragmas')
@@ -0,0 +1,137 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Attempt, Response
+
+logger = logging.getLogger(__name__)
+
+
+def parse_autosave(data):
+    """Extract ``{question_id: option_or_None}`` from ``question_<id>`` fields.
+
+    An empty value records that the student cleared the question.
+    """
+    answers = {}
+    for field, value in data.items():
+        if not field.startswith('question_'):
+            continue
+        try:
+            question_id = int(field[9:])
+            option = int(value) if value != '' else None
+        except (TypeError, ValueError):
+            continue
+        if option is None or 1 <= option <= 4:
+            answers[question_id] = option
+    return answers
+
+
+def save_responses(attempt_id, answers):
+    """Upsert ``{question_id: option}`` for an attempt in a single statement."""
+    rows = [
+        Response(attempt_id=attempt_id, question_id=question_id, selected_option=option)
+        for question_id, option in answers.items()
+    ]
+    _upsert(rows)
+
+
+def _upsert(rows):
+    if rows:
+        Response.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['attempt', 'question'],
+            update_fields=['selected_option', 'updated_at'],
+        )
+
+
+def _upsert_open(pending):
+    """Upsert buffered ``{(attempt_id, question_id): option}`` for attempts still in progress.
+
+    A flush can run after the attempt was submitted (a timer, or a buffer in
+    another process), and must not overwrite the final answers.
+    """
+    if not pending:
+        return 0
+    with transaction.atomic():
+        open_ids = set(Attempt.objects.filter(
+            id__in={attempt_id for attempt_id, _ in pending}, is_submitted=False, grading_job=None
+        ).values_list('id', flat=True))
+        rows = [
+            Response(attempt_id=key[0], question_id=key[1], selected_option=option)
+            for key, option in pending.items()
+            if key[0] in open_ids
+        ]
+        _upsert(rows)
+    return len(rows)
+
+
+class ResponseBuffer:
+    """Coalesces autosaved answers in memory and writes them in batches.
+
+    Repeated saves of the same question only keep the latest option, and the
+    pending set is flushed with one upsert once it reaches ``batch_size``
+    entries or has waited ``max_delay`` seconds, whichever comes first.
+    """
+
+    def __init__(self, batch_size, max_delay):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+
+    def add(self, attempt_id, answers):
+        with self._lock:
+            for question_id, option in answers.items():
+                self._pending[(attempt_id, question_id)] = option
+            full = len(self._pending) >= self.batch_size
+            if not full and self._timer is None and self._pending:
+                self._timer = threading.Timer(self.max_delay, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self, attempt_id=None):
+        with self._lock:
+            if attempt_id is None:
+                pending, self._pending = self._pending, {}
+            else:
+                pending = {
+                    key: self._pending.pop(key)
+                    for key in [key for key in self._pending if key[0] == attempt_id]
+                }
+            if not self._pending and self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        try:
+            return _upsert_open(pending)
+        except Exception:
+            # Put the answers back unless a newer save already replaced them.
+            with self._lock:
+                for key, option in pending.items():
+                    self._pending.setdefault(key, option)
+            raise
+
+    def _flush_from_timer(self):
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to flush autosaved responses")
+        finally:
+            connection.close()
+
+    def __len__(self):
+        return len(self._pending)
+
+
+response_buffer = ResponseBuffer(
+    batch_size=getattr(settings, 'EXAM_AUTOSAVE_BATCH_SIZE', 200),
+    max_delay=getattr(settings, 'EXAM_AUTOSAVE_MAX_DELAY', 2.0),
+)
@@ -0,0 +1,83 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def _version_key(exam_id):
+    return f'exam:{exam_id}:version'
+
+
+def _get_version(key):
+    """Read a version counter, seeding it if missing.
+
+    A missing version is seeded from the clock rather than 1 so that an
+    evicted counter can never hand out a version an older cached entry was
+    built under.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Nothing cached under this version yet, so seeding is enough.
+        return _get_version(key)
+
+
+def get_exam_version(exam_id):
+    """Current cache version of an exam's questions."""
+    return _get_version(_version_key(exam_id))
+
+
+def bump_exam_version(exam_id):
+    return _bump_version(_version_key(exam_id))
+
+
+def get_catalog_version():
+    """Current cache version of the exam list shown to students."""
+    return _get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    return _bump_version(CATALOG_VERSION_KEY)
+
+
+def bump_on_commit(bump, *args):
+    """Call a version ``bump`` now and again once the current transaction commits.
+
+    The first bump serves readers inside the writing transaction. Until the
+    commit, other requests still see the old rows and may cache them under
+    the new version; the second bump retires those entries. Outside a
+    transaction both run straight away.
+    """
+    bump(*args)
+    transaction.on_commit(lambda: bump(*args))
+
+
+def versioned_timeout(longest=None):
+    """Timeout for data cached under an exam or catalog version, capped at ``longest``.
+
+    A bump only reaches processes that share the cache. With a per-process
+    cache, EXAM_CACHE_TIMEOUT bounds how long other processes keep serving
+    data from before a change.
+    """
+    timeout = getattr(settings, 'EXAM_CACHE_TIMEOUT', None)
+    if timeout is None or longest is None:
+        return longest if timeout is None else timeout
+    return min(timeout, longest)
+
+
+def exam_cache_key(exam_id, name, version=None):
+    if version is None:
+        version = get_exam_version(exam_id)
+    return f'exam:{exam_id}:v{version}:{name}'
@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.db.models.functions import Coalesce
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .caching import get_catalog_version, versioned_timeout
+from .models import Attempt, Exam
+from .pagination import decode_cursor, keyset_page
+from .sampling import questions_per_attempt
+
+CATALOG_PAGE_SIZE = 24
+# Only the pages reached by following "next" from the first page are cached,
+# and only this many of them, so arbitrary cursors cannot fill the cache.
+CATALOG_CACHED_PAGES = 10
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+
+def catalog_page(cursor=None):
+    """Return ``(cards, next_cursor)`` for one page of the student exam list.
+
+    ``cards`` is a list of ``(exam_id, html)``. The first
+    ``CATALOG_CACHED_PAGES`` pages are rendered once per catalog version and
+    cached, so a warm page costs no queries however large the catalog grows.
+    Raises ValueError for a cursor that does not decode.
+    """
+    if cursor and decode_cursor(cursor) is None:
+        raise ValueError(f'Invalid catalog cursor: {cursor!r}')
+    prefix = f'catalog:v{get_catalog_version()}'
+    page_key, depth_key = f'{prefix}:page:{cursor or "first"}', f'{prefix}:depth:{cursor}'
+    cached = cache.get_many([page_key, depth_key] if cursor else [page_key])
+    page = cached.get(page_key)
+    if page is None:
+        exams, next_cursor = keyset_page(
+            Exam.objects.annotate(question_count=Coalesce('stats__question_count', 0))
+            .only('id', 'title', 'description', 'duration_minutes', 'total_questions', 'created_at'),
+            cursor, CATALOG_PAGE_SIZE, field='created_at',
+        )
+        for exam in exams:
+            # What a student is asked, which is less than the pool when questions are sampled.
+            exam.question_count = questions_per_attempt(exam, exam.question_count)
+        cards = [(exam.id, render_to_string('exam_card.html', {'exam': exam})) for exam in exams]
+        page = (cards, next_cursor)
+        depth = 0 if cursor is None else cached.get(depth_key)
+        if depth is not None:
+            entries = {page_key: page}
+            if next_cursor and depth + 1 < CATALOG_CACHED_PAGES:
+                entries[f'{prefix}:depth:{next_cursor}'] = depth + 1
+            cache.set_many(entries, versioned_timeout(CATALOG_CACHE_TIMEOUT))
+    cards, next_cursor = page
+    return [(exam_id, mark_safe(html)) for exam_id, html in cards], next_cursor
+
+
+def attempt_status(user, exam_ids):
+    """Map each exam in ``exam_ids`` the user has finished to their attempt count and best score."""
+    rows = (
+        Attempt.objects.filter(user=user, is_submitted=True, exam_id__in=exam_ids)
+        .values('exam_id')
+        .annotate(attempts=Count('id'), best_score=Max('score'))
+        .order_by()
+    )
+    return {row.pop('exam_id'): row for row in rows}
@@ -0,0 +1,25 @@
+# PRAGMAs applied to every SQLite connection in production mode. WAL lets
+# readers proceed while a write is in progress; NORMAL sync is durable across
+# application crashes in WAL mode and avoids an fsync per commit.
+# busy_timeout is the only lock wait: it replaces the timeout passed to
+# sqlite3.connect, so settings leave that at Django's default.
+SQLITE_PRODUCTION_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', 20000),
+    ('mmap_size', 256 * 1024 * 1024),
+    ('cache_size', -64 * 1024),
+    ('temp_store', 'MEMORY'),
+)
+
+
+def apply_sqlite_pragmas(cursor, pragmas=SQLITE_PRODUCTION_PRAGMAS):
+    for name, value in pragmas:
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """``connection_created`` handler enabling the production PRAGMAs."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            apply_sqlite_pragmas(cursor)
@@ -0,0 +1,27 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+
+
+def async_login_required(view):
+    """``login_required`` for ``async def`` views.
+
+    Resolving ``request.user`` reads the session and user tables, so it is
+    done once in a worker thread; the view then sees the loaded user.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    obj = await queryset.filter(**kwargs).afirst()
+    if obj is None:
+        raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+    return obj
@@ -0,0 +1,84 @@
+import re
+import zlib
+
+import numpy as np
+
+# 32 hash functions in 8 bands of 4: a pair with Jaccard similarity s shares
+# at least one band with probability 1 - (1 - s**4)**8 (about 0.98 at s=0.8).
+NUM_HASHES = 32
+BANDS = 8
+SHINGLE_SIZE = 5
+
+
+def shingles(text):
+    """Hashes of the overlapping character ``SHINGLE_SIZE``-grams of normalized text."""
+    text = ' '.join(re.findall(r'\w+', text.lower()))
+    if len(text) <= SHINGLE_SIZE:
+        return np.array([zlib.crc32(text.encode())], dtype=np.uint64)
+    return np.unique(np.fromiter(
+        (zlib.crc32(text[i:i + SHINGLE_SIZE].encode()) for i in range(len(text) - SHINGLE_SIZE + 1)),
+        dtype=np.uint64,
+    ))
+
+
+class MinHasher:
+    def __init__(self, seed=0):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(0, 1 << 63, NUM_HASHES, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 1 << 63, NUM_HASHES, dtype=np.uint64)
+
+    def signatures(self, shingle_sets):
+        """Return a ``(len(shingle_sets), NUM_HASHES)`` array of MinHash signatures."""
+        lengths = np.array([len(s) for s in shingle_sets])
+        values = np.concatenate(shingle_sets)
+        # Multiply-shift hashing: (a * x + b) mod 2**64, keeping the high 32 bits.
+        hashed = ((np.outer(self.a, values) + self.b[:, None]) >> np.uint64(32)).astype(np.uint32)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        return np.minimum.reduceat(hashed, starts, axis=1).T
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def near_duplicate_groups(ids, signatures, threshold):
+    """Group ids whose estimated Jaccard similarity is at least ``threshold``.
+
+    Locality-sensitive hashing: each band of the signatures is a bucket key,
+    so only questions that share a bucket are compared. Within a bucket the
+    questions are sorted by signature and each is compared with the first
+    question and with its predecessor, so chains of near duplicates that
+    differ from the first one are still joined. This is one pass over the
+    data rather than comparing every pair.
+    """
+    ids = np.asarray(ids)
+    parent = list(range(len(ids)))
+    rows = NUM_HASHES // BANDS
+    # Rank of each full signature, so similar questions sit together in a bucket.
+    rank = np.empty(len(ids), dtype=np.int64)
+    rank[np.lexsort(signatures.T[::-1])] = np.arange(len(ids))
+    for band in range(BANDS):
+        keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * rows))).ravel()
+        _, bucket = np.unique(keys, return_inverse=True)
+        order = np.lexsort((rank, bucket))
+        sorted_buckets = bucket[order]
+        same = sorted_buckets[1:] == sorted_buckets[:-1]
+        starts = np.flatnonzero(np.r_[True, ~same])
+        heads = np.repeat(order[starts], np.diff(np.r_[starts, len(order)]))
+        candidates = heads != order
+        first = np.concatenate((heads[candidates], order[:-1][same]))
+        other = np.concatenate((order[candidates], order[1:][same]))
+        similarity = (signatures[first] == signatures[other]).mean(axis=1)
+        for i, j in zip(first[similarity >= threshold].tolist(), other[similarity >= threshold].tolist()):
+            root_i, root_j = _find(parent, i), _find(parent, j)
+            if root_i != root_j:
+                parent[root_j] = root_i
+
+    groups = {}
+    for index in range(len(ids)):
+        groups.setdefault(_find(parent, index), []).append(int(ids[index]))
+    return sorted((group for group in groups.values() if len(group) > 1), key=len, reverse=True)
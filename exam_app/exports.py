@@ -0,0 +1,77 @@
+import csv
+from tempfile import SpooledTemporaryFile
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .importers import REQUIRED_COLUMNS
+
+# Rows fetched from the database per round trip while exporting.
+EXPORT_CHUNK_SIZE = 2000
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+ATTEMPT_COLUMNS = ['attempt_id', 'student', 'exam', 'score', 'started_at', 'completed_at']
+QUESTION_COLUMNS = REQUIRED_COLUMNS + ['marks']
+
+
+class Echo:
+    """File-like object whose ``write`` returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def attempt_rows(queryset):
+    rows = queryset.order_by('-completed_at', '-id').values_list(
+        'id', 'user__username', 'exam__title', 'score', 'started_at', 'completed_at'
+    )
+    for attempt_id, username, title, score, started_at, completed_at in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            attempt_id, username, title, score,
+            timezone.localtime(started_at).isoformat(),
+            timezone.localtime(completed_at).isoformat() if completed_at else '',
+        ]
+
+
+def question_rows(exam):
+    """Question rows in the column layout accepted by the question importer."""
+    rows = exam.questions.order_by('id').values_list(*QUESTION_COLUMNS)
+    return rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_csv(header, rows, filename):
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def xlsx_response(header, rows, filename):
+    """Write rows with openpyxl's write-only mode and return the workbook.
+
+    Write-only mode keeps one row in memory at a time. The finished zip is
+    spooled to a temporary file, which moves to disk once it grows large.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    output = SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
+
+
+def export_response(export_format, header, rows, basename):
+    if export_format == 'xlsx':
+        return xlsx_response(header, rows, f'{basename}.xlsx')
+    return stream_csv(header, rows, f'{basename}.csv')
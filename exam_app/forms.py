@@ -1,6 +1,9 @@
+from datetime import datetime, time, timedelta
+
 from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
+from django.utils import timezone
 from .models import Exam, Question
 
 
@@ -31,7 +34,7 @@ class StudentRegistrationForm(UserCreationForm):
 class ExamForm(forms.ModelForm):
     class Meta:
         model = Exam
-        fields = ['title', 'description', 'duration_minutes', 'pass_marks']
+        fields = ['title', 'description', 'duration_minutes', 'total_questions', 'stratify_by_marks', 'pass_marks']
         widgets = {
             'description': forms.Textarea(attrs={'rows': 3}),
         }
@@ -53,3 +56,30 @@ class QuestionUploadForm(forms.Form):
         super().__init__(*args, **kwargs)
         self.fields['exam'].queryset = Exam.objects.all()
 
+
+class ResultsFilterForm(forms.Form):
+    exam = forms.ModelChoiceField(queryset=Exam.objects.all(), required=False, empty_label="All exams")
+    student = forms.CharField(required=False, label="Student username")
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def filter(self, queryset):
+        if not self.is_valid():
+            return queryset
+        data = self.cleaned_data
+        if data['exam']:
+            queryset = queryset.filter(exam=data['exam'])
+        if data['student']:
+            queryset = queryset.filter(user__username=data['student'].strip())
+        if data['date_from']:
+            start = timezone.make_aware(datetime.combine(data['date_from'], time.min))
+            queryset = queryset.filter(completed_at__gte=start)
+        if data['date_to']:
+            end = timezone.make_aware(datetime.combine(data['date_to'] + timedelta(days=1), time.min))
+            queryset = queryset.filter(completed_at__lt=end)
+        return queryset
+
+
+class QuestionSearchForm(forms.Form):
+    q = forms.CharField(required=False, label="Search", max_length=200)
+    exam = forms.ModelChoiceField(queryset=Exam.objects.all(), required=False, empty_label="All exams")
@@ -0,0 +1,165 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .autosave import save_responses
+from .models import SUBMIT_GRACE_SECONDS, Attempt, Exam, GradingJob
+from .scoring import score_answers
+from .stats import record_attempt
+
+logger = logging.getLogger('exam_app.grading')
+
+# A job that raises is retried after 30s, 1m, 2m and 4m, then left FAILED
+# until an operator runs "grade_submissions --retry-failed".
+MAX_GRADING_TRIES = 5
+GRADING_RETRY_DELAY = timedelta(seconds=30)
+
+
+def grade_attempt(attempt, answers=None, completed_at=None):
+    """Score an attempt and mark it submitted.
+
+    ``answers`` defaults to the responses stored for the attempt, which is
+    how queued submissions are graded. Returns None if the attempt was
+    already graded, for example by a concurrent submit or cleanup.
+    """
+    if answers is None:
+        answers = {
+            question_id: option
+            for question_id, option in attempt.responses.exclude(
+                selected_option=None
+            ).values_list('question_id', 'selected_option')
+        }
+    result = score_answers(attempt.exam_id, answers, attempt.question_set)
+
+    completed_at = completed_at or timezone.now()
+    with transaction.atomic():
+        # Only the first grader flips the flag, so stats are recorded once.
+        marked = Attempt.objects.filter(pk=attempt.pk, is_submitted=False).update(
+            score=result['score'], completed_at=completed_at, is_submitted=True, graded_at=timezone.now()
+        )
+        if not marked:
+            return None
+        attempt.score = result['score']
+        attempt.completed_at = completed_at
+        attempt.is_submitted = True
+        record_attempt(attempt)
+    return result
+
+
+def finalize_submission(attempt, answers):
+    """Store the final answers and grade the attempt in one transaction.
+
+    Like queued grading, the score covers every stored response, so answers
+    autosaved earlier still count when the final form lacks them (a timed
+    auto-submit before the paper loaded). Returns None, leaving the stored
+    answers untouched, if the attempt was already graded.
+    """
+    with transaction.atomic():
+        save_responses(attempt.id, answers)
+        result = grade_attempt(attempt)
+        if result is None:
+            transaction.set_rollback(True)
+        return result
+
+
+def enqueue_submission(attempt, answers):
+    """Store the final answers and queue the attempt for a grading worker.
+
+    Raises IntegrityError if the attempt was already queued.
+    """
+    with transaction.atomic():
+        save_responses(attempt.id, answers)
+        return GradingJob.objects.create(attempt=attempt)
+
+
+def claim_jobs(limit, worker=None):
+    """Atomically move up to ``limit`` pending jobs that are due to running and return them."""
+    worker = worker or uuid.uuid4().hex
+    with transaction.atomic():
+        job_ids = list(
+            GradingJob.objects.filter(status=GradingJob.PENDING)
+            .filter(Q(retry_at=None) | Q(retry_at__lte=timezone.now()))
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        GradingJob.objects.filter(id__in=job_ids, status=GradingJob.PENDING).update(
+            status=GradingJob.RUNNING, worker=worker, started_at=timezone.now()
+        )
+    return list(
+        GradingJob.objects.filter(id__in=job_ids, worker=worker, status=GradingJob.RUNNING)
+        .select_related('attempt')
+    )
+
+
+def run_job(job):
+    """Grade a claimed job, putting it back in the queue with a backoff if it fails."""
+    try:
+        with transaction.atomic():
+            grade_attempt(job.attempt, completed_at=job.submitted_at)
+            job.status = GradingJob.DONE
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'finished_at'])
+    except Exception as e:
+        job.tries += 1
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.worker = ''
+        if job.tries < MAX_GRADING_TRIES:
+            job.status = GradingJob.PENDING
+            job.retry_at = job.finished_at + GRADING_RETRY_DELAY * 2 ** (job.tries - 1)
+            logger.warning('Grading attempt %s failed (try %d), retrying at %s: %s',
+                           job.attempt_id, job.tries, job.retry_at, e)
+        else:
+            job.status = GradingJob.FAILED
+            job.retry_at = None
+            logger.error('Grading attempt %s failed after %d tries: %s', job.attempt_id, job.tries, e)
+        job.save(update_fields=['status', 'error', 'finished_at', 'worker', 'tries', 'retry_at'])
+    return job
+
+
+def requeue_stale_jobs(older_than):
+    """Return running jobs whose worker has been silent for ``older_than`` back to the queue."""
+    return GradingJob.objects.filter(
+        status=GradingJob.RUNNING, started_at__lt=timezone.now() - older_than
+    ).update(status=GradingJob.PENDING, worker='')
+
+
+def retry_failed_jobs():
+    """Queue every FAILED job again with a fresh set of tries."""
+    return GradingJob.objects.filter(status=GradingJob.FAILED).update(
+        status=GradingJob.PENDING, tries=0, retry_at=None, worker=''
+    )
+
+
+def resumable_attempt(user, exam):
+    """Return the user's unsubmitted attempt at ``exam`` that still has time left."""
+    cutoff = timezone.now() - timedelta(seconds=exam.duration_minutes * 60)
+    attempt = Attempt.objects.filter(
+        user=user, exam=exam, is_submitted=False, grading_job=None, started_at__gt=cutoff
+    ).order_by('-started_at').first()
+    if attempt is not None:
+        attempt.exam = exam
+    return attempt
+
+
+def abandoned_attempts(older_than):
+    """Unsubmitted, unqueued attempts whose time ran out more than ``older_than`` ago."""
+    now = timezone.now()
+    for exam_id, duration_minutes in Exam.objects.values_list('id', 'duration_minutes').iterator():
+        cutoff = now - timedelta(minutes=duration_minutes, seconds=SUBMIT_GRACE_SECONDS) - older_than
+        yield exam_id, Attempt.objects.filter(
+            exam_id=exam_id, is_submitted=False, grading_job=None, started_at__lt=cutoff
+        )
+
+
+def pending_attempts(user):
+    """The user's queued attempts that have no score yet, including those whose grading failed."""
+    return Attempt.objects.filter(
+        user=user,
+        is_submitted=False,
+        grading_job__status__in=[GradingJob.PENDING, GradingJob.RUNNING, GradingJob.FAILED],
+    ).select_related('exam', 'grading_job')
@@ -0,0 +1,274 @@
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .caching import bump_catalog_version, bump_exam_version, bump_on_commit
+from .models import Question
+from .stats import adjust_question_count
+
+REQUIRED_COLUMNS = ['text', 'option1', 'option2', 'option3', 'option4', 'correct_answer']
+TEXT_COLUMNS = ['text', 'option1', 'option2', 'option3', 'option4']
+OPTION_MAX_LENGTH = Question._meta.get_field('option1').max_length
+
+# Rows are read, validated and committed this many at a time.
+CHUNK_SIZE = 2000
+
+
+STUDENT_COLUMNS = ['email', 'full_name', 'password']
+USERNAME_MAX_LENGTH = User._meta.get_field('username').max_length
+NAME_MAX_LENGTH = User._meta.get_field('first_name').max_length
+
+
+class QuestionImportError(Exception):
+    """Raised when a file cannot be imported at all (e.g. missing columns)."""
+
+
+class StudentImportError(Exception):
+    """Raised when a student file cannot be imported at all."""
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    errors: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def total_rows(self):
+        return self.created + len(self.errors)
+
+    @property
+    def rows_per_second(self):
+        return self.total_rows / self.elapsed if self.elapsed else 0.0
+
+
+def _read_xlsx(file, chunk_size):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_size:
+                yield pd.DataFrame(batch, columns=header, dtype=object)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header, dtype=object)
+    finally:
+        workbook.close()
+
+
+def read_chunks(file, chunk_size=CHUNK_SIZE):
+    """Yield DataFrames of at most ``chunk_size`` rows from a CSV/Excel upload.
+
+    CSV is parsed incrementally by pandas and XLSX through openpyxl's
+    read-only mode, so memory use does not grow with the file.
+    """
+    name = file.name.lower()
+    if name.endswith('.csv'):
+        yield from pd.read_csv(file, chunksize=chunk_size, dtype=str, keep_default_na=False)
+    elif name.endswith('.xls'):
+        # Legacy .xls cannot be streamed by openpyxl; fall back to pandas.
+        df = pd.read_excel(file, dtype=object)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+    else:
+        yield from _read_xlsx(file, chunk_size)
+
+
+def _as_text(series):
+    def convert(value):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return ''
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip()
+
+    return series.map(convert)
+
+
+def validate_chunk(df, first_row):
+    """Split a chunk into clean rows and ``(row_number, message)`` errors.
+
+    ``first_row`` is the spreadsheet row number of the chunk's first record
+    (the header being row 1). All checks are column-wise operations.
+    """
+    df = df.rename(columns=lambda c: str(c).strip())
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise QuestionImportError(f"Missing required columns: {', '.join(missing)}")
+
+    df = df.reset_index(drop=True)
+    clean = pd.DataFrame({column: _as_text(df[column]) for column in TEXT_COLUMNS})
+    empty_rows = (clean == '').all(axis=1) & (_as_text(df['correct_answer']) == '')
+
+    correct = pd.to_numeric(_as_text(df['correct_answer']), errors='coerce')
+    if 'marks' in df.columns:
+        marks_text = _as_text(df['marks'])
+        marks = pd.to_numeric(marks_text, errors='coerce').where(marks_text != '', 1)
+    else:
+        marks = pd.Series(1, index=df.index, dtype=float)
+
+    checks = [
+        (clean['text'] == '', "text is empty"),
+        ((clean[TEXT_COLUMNS[1:]] == '').any(axis=1), "all four options are required"),
+        (clean[TEXT_COLUMNS[1:]].apply(lambda s: s.str.len()).gt(OPTION_MAX_LENGTH).any(axis=1),
+         f"options must be at most {OPTION_MAX_LENGTH} characters"),
+        (~correct.isin([1, 2, 3, 4]), "correct_answer must be a number from 1 to 4"),
+        (marks.isna() | (marks < 1) | (marks % 1 != 0), "marks must be a positive whole number"),
+    ]
+
+    invalid = pd.Series(False, index=df.index)
+    messages = pd.Series('', index=df.index, dtype=object)
+    for mask, message in checks:
+        mask = mask & ~empty_rows
+        messages[mask] = messages[mask].map(lambda m: f"{m}; {message}" if m else message)
+        invalid |= mask
+
+    errors = [
+        (first_row + int(index), messages[index])
+        for index in np.flatnonzero(invalid.to_numpy())
+    ]
+    keep = ~invalid & ~empty_rows
+    clean = clean[keep].assign(
+        correct_answer=correct[keep].astype(int),
+        marks=marks[keep].astype(int),
+    )
+    return clean, errors
+
+
+def import_questions(exam, file, chunk_size=CHUNK_SIZE):
+    """Import questions for ``exam`` from an uploaded CSV/Excel file.
+
+    Each chunk is validated as a whole and inserted with ``bulk_create``.
+    Invalid rows are skipped and listed in the returned :class:`ImportReport`
+    instead of aborting the import. A file that cannot be read, even past
+    the first chunk, imports nothing: all chunks share one transaction.
+    """
+    report = ImportReport()
+    started = time.perf_counter()
+    first_row = 2
+    try:
+        with transaction.atomic():
+            for chunk in read_chunks(file, chunk_size):
+                clean, errors = validate_chunk(chunk, first_row)
+                first_row += len(chunk)
+                report.errors.extend(errors)
+                questions = [
+                    Question(exam=exam, **row)
+                    for row in clean.to_dict('records')
+                ]
+                Question.objects.bulk_create(questions, batch_size=500)
+                adjust_question_count(exam.id, len(questions))
+                report.created += len(questions)
+    except Exception:
+        report.created = 0
+        raise
+    finally:
+        report.elapsed = time.perf_counter() - started
+    if report.created:
+        # bulk_create skips the post_save signal that normally does this.
+        bump_on_commit(bump_exam_version, exam.id)
+        bump_on_commit(bump_catalog_version)
+    return report
+
+
+def _is_email(value):
+    try:
+        validate_email(value)
+    except ValidationError:
+        return False
+    return True
+
+
+def _picture_missing(name, pictures_dir):
+    return (
+        os.path.basename(name) != name
+        or not os.path.isfile(os.path.join(pictures_dir, name))
+    )
+
+
+def validate_student_chunk(df, first_row, seen, pictures_dir=None):
+    """Split a chunk of student rows into clean rows and ``(row_number, email, message)`` errors.
+
+    Emails are the usernames, as in the registration form. ``seen`` holds
+    the emails accepted from earlier chunks and is updated in place.
+    Passwords are checked later, in :func:`hash_passwords`.
+    """
+    df = df.rename(columns=lambda c: str(c).strip())
+    missing = [column for column in STUDENT_COLUMNS if column not in df.columns]
+    if missing:
+        raise StudentImportError(f"Missing required columns: {', '.join(missing)}")
+
+    df = df.reset_index(drop=True)
+    clean = pd.DataFrame({
+        'email': _as_text(df['email']).str.lower(),
+        'full_name': _as_text(df['full_name']),
+        # Passwords are taken as written, spaces included.
+        'password': df['password'].map(lambda value: '' if value is None or value != value else str(value)),
+        'profile_pic': _as_text(df['profile_pic']) if 'profile_pic' in df.columns else '',
+    })
+    empty_rows = (clean[['email', 'full_name', 'password']] == '').all(axis=1)
+
+    emails = clean['email']
+    existing = set(User.objects.filter(username__in=emails[emails != ''].unique().tolist())
+                   .values_list('username', flat=True))
+    checks = [
+        (~emails.map(_is_email), "email is not a valid address"),
+        (emails.str.len() > USERNAME_MAX_LENGTH, f"email must be at most {USERNAME_MAX_LENGTH} characters"),
+        (emails.isin(existing), "a user with this email already exists"),
+        (emails.isin(seen) | emails.duplicated(), "email appears more than once in the file"),
+        (clean['full_name'] == '', "full_name is empty"),
+        (clean['full_name'].str.len() > NAME_MAX_LENGTH, f"full_name must be at most {NAME_MAX_LENGTH} characters"),
+        (clean['password'] == '', "password is empty"),
+    ]
+    if pictures_dir is not None:
+        pictures = clean['profile_pic']
+        checks.append((
+            pictures.map(lambda name: name != '' and _picture_missing(name, pictures_dir)),
+            "profile_pic is not a file in the pictures directory",
+        ))
+
+    invalid = pd.Series(False, index=df.index)
+    messages = pd.Series('', index=df.index, dtype=object)
+    for mask, message in checks:
+        mask = mask & ~empty_rows
+        messages[mask] = messages[mask].map(lambda m: f"{m}; {message}" if m else message)
+        invalid |= mask
+
+    errors = [
+        (first_row + int(index), emails[index], messages[index])
+        for index in np.flatnonzero(invalid.to_numpy())
+    ]
+    clean = clean[~invalid & ~empty_rows]
+    seen.update(clean['email'])
+    return clean, errors
+
+
+def hash_passwords(rows):
+    """Validate and hash ``(email, full_name, password)`` rows.
+
+    Returns ``(hash, None)`` or ``(None, message)`` per row. Hashing is the
+    slow part of creating a user, so this runs in worker processes.
+    """
+    results = []
+    for email, full_name, password in rows:
+        try:
+            validate_password(password, User(username=email, email=email, first_name=full_name))
+        except ValidationError as e:
+            results.append((None, ' '.join(e.messages)))
+        else:
+            results.append((make_password(password), None))
+    return results
@@ -0,0 +1,71 @@
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from exam_app.models import Attempt, Exam, Question
+from exam_app.queryplans import hot_querysets
+
+
+def _time_queryset(queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset.all())
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        'Times the hot listing/lookup queries with and without the Attempt and Question indexes. '
+        'The indexes are dropped inside a transaction that is rolled back, so run it against a '
+        'seeded copy of the database (see seed_data) rather than production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query; the median is reported.')
+        parser.add_argument('--user', help='Username to query as (defaults to the most active student).')
+        parser.add_argument('--exam', type=int, help='Exam id to query (defaults to the most attempted exam).')
+
+    def handle(self, *args, **options):
+        user, exam = self._subjects(options['user'], options['exam'])
+        querysets = hot_querysets(user, exam)
+        indexes = [index.name for model in (Attempt, Question) for index in model._meta.indexes]
+
+        report = {name: {'indexed_ms': round(_time_queryset(qs, options['repeat']), 3),
+                         'plan': qs.explain().splitlines()}
+                  for name, qs in querysets.items()}
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+            for name, qs in querysets.items():
+                unindexed = _time_queryset(qs, options['repeat'])
+                report[name]['unindexed_ms'] = round(unindexed, 3)
+                report[name]['speedup'] = round(unindexed / max(report[name]['indexed_ms'], 1e-6), 1)
+            transaction.set_rollback(True)
+
+        self.stdout.write(json.dumps({
+            'user': user.username,
+            'exam_id': exam.id,
+            'attempts': Attempt.objects.count(),
+            'dropped_indexes': indexes,
+            'queries': report,
+        }, indent=2))
+
+    def _subjects(self, username, exam_id):
+        if username:
+            user = User.objects.filter(username=username).first()
+        else:
+            user = User.objects.annotate(n=Count('attempt')).order_by('-n').first()
+        exam = Exam.objects.filter(id=exam_id).first() if exam_id else (
+            Exam.objects.annotate(n=Count('attempt')).order_by('-n').first()
+        )
+        if user is None or exam is None:
+            raise CommandError('Need at least one user and one exam; run seed_data first.')
+        return user, exam
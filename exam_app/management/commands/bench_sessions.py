@@ -0,0 +1,63 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from exam_app.management.commands.loadtest import Command as LoadTest, simulate_student
+
+PASSWORD = 'bench-sessions-pass'
+
+
+def measure(strategy, exam_id, students, host):
+    """Run ``students`` through the exam flow and return mean queries per endpoint."""
+    samples = defaultdict(list)
+    cache.clear()
+    with override_settings(SESSION_ENGINE=settings.EXAM_SESSION_ENGINES[strategy]):
+        for i in range(students):
+            for sample in simulate_student(f'bench-sessions-{i}', PASSWORD, exam_id, host, i):
+                samples[sample['endpoint']].append(sample)
+    return {
+        endpoint: {
+            'queries': round(sum(row['queries'] for row in rows) / len(rows), 2),
+            'session_queries': round(sum(row['session_queries'] for row in rows) / len(rows), 2),
+        }
+        for endpoint, rows in samples.items()
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Counts database queries per exam-flow request, and how many of them touch django_session, '
+        'under each EXAM_SESSION_STRATEGY. Runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5, help='Simulated students per strategy.')
+        parser.add_argument('--exam', type=int, help='Exam id to take (defaults to the first exam with questions).')
+        parser.add_argument('--host', default='localhost', help='Host header sent with each request.')
+
+    def handle(self, *args, **options):
+        exam = LoadTest()._get_exam(options['exam'])
+        report = {}
+        with transaction.atomic():
+            password = make_password(PASSWORD)
+            User.objects.bulk_create([
+                User(username=f'bench-sessions-{i}', password=password) for i in range(options['students'])
+            ])
+            for strategy in settings.EXAM_SESSION_ENGINES:
+                report[strategy] = measure(strategy, exam.id, options['students'], options['host'])
+            transaction.set_rollback(True)
+
+        for strategy, endpoints in report.items():
+            endpoints['flow_total'] = {
+                key: round(sum(row[key] for row in endpoints.values()), 2)
+                for key in ('queries', 'session_queries')
+            }
+        self.stdout.write(json.dumps({'exam_id': exam.id, 'students': options['students'], 'strategies': report},
+                                     indent=2))
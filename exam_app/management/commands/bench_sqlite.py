@@ -0,0 +1,193 @@
+import json
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+from django.core.management.base import BaseCommand
+
+from exam_app.db import apply_sqlite_pragmas
+from exam_app.management.commands.loadtest import percentile
+
+SCHEMA = '''
+CREATE TABLE attempt (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    exam_id INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    completed_at TEXT,
+    score REAL NOT NULL DEFAULT 0,
+    is_submitted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX attempt_recent ON attempt (completed_at DESC, id DESC) WHERE is_submitted;
+'''
+READ_SQL = 'SELECT id, score, completed_at FROM attempt WHERE is_submitted ORDER BY completed_at DESC, id DESC LIMIT 50'
+
+
+def _create_attempt(conn, n):
+    cursor = conn.execute(
+        "INSERT INTO attempt (user_id, exam_id, started_at) VALUES (?, ?, datetime('now'))", (n, n % 50)
+    )
+    return cursor.lastrowid
+
+
+def _finalize_attempt(conn, attempt_id):
+    conn.execute(
+        "UPDATE attempt SET score = 1, completed_at = datetime('now'), is_submitted = 1 WHERE id = ?",
+        (attempt_id,),
+    )
+
+
+class _BatchingWriter(threading.Thread):
+    """Single writer that commits queued operations in batches (mirrors exam_app.writer)."""
+
+    def __init__(self, path, max_batch=64, max_wait=0.002):
+        super().__init__(daemon=True)
+        self.path = path
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+
+    def submit(self, func, *args):
+        future = Future()
+        self.queue.put((func, args, future))
+        return future.result()
+
+    def run(self):
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        apply_sqlite_pragmas(conn)
+        while True:
+            batch = [self.queue.get()]
+            if batch[0] is None:
+                break
+            while len(batch) < self.max_batch:
+                try:
+                    item = self.queue.get(timeout=self.max_wait)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.queue.put(None)
+                    break
+                batch.append(item)
+            conn.execute('BEGIN IMMEDIATE')
+            results = [func(conn, *args) for func, args, _ in batch]
+            conn.execute('COMMIT')
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+        conn.close()
+
+
+def run_benchmark(mode, writers, readers, ops, rows):
+    fd, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(fd)
+    try:
+        setup = sqlite3.connect(path, isolation_level=None)
+        if mode == 'production':
+            apply_sqlite_pragmas(setup)
+        setup.executescript(SCHEMA)
+        setup.execute('BEGIN')
+        setup.executemany(
+            "INSERT INTO attempt (user_id, exam_id, started_at, completed_at, score, is_submitted) "
+            "VALUES (?, ?, datetime('now'), datetime('now', ?), 1, 1)",
+            ((i, i % 50, f'-{i} seconds') for i in range(rows)),
+        )
+        setup.execute('COMMIT')
+        setup.close()
+
+        write_latencies, read_latencies = [], []
+        errors = {'locked': 0}
+        stop = threading.Event()
+        writer = None
+        if mode == 'production':
+            writer = _BatchingWriter(path)
+            writer.start()
+
+        def write_loop(worker):
+            conn = None
+            if writer is None:
+                # Django's default: rollback journal, FULL sync, 5s busy timeout.
+                conn = sqlite3.connect(path, timeout=5)
+            for n in range(ops):
+                started = time.perf_counter()
+                try:
+                    if writer is None:
+                        with conn:
+                            attempt_id = _create_attempt(conn, worker * ops + n)
+                        with conn:
+                            _finalize_attempt(conn, attempt_id)
+                    else:
+                        attempt_id = writer.submit(_create_attempt, worker * ops + n)
+                        writer.submit(_finalize_attempt, attempt_id)
+                except sqlite3.OperationalError:
+                    errors['locked'] += 1
+                    continue
+                write_latencies.append(time.perf_counter() - started)
+            if conn is not None:
+                conn.close()
+
+        def read_loop():
+            conn = sqlite3.connect(path, timeout=5)
+            if mode == 'production':
+                apply_sqlite_pragmas(conn)
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    conn.execute(READ_SQL).fetchall()
+                except sqlite3.OperationalError:
+                    errors['locked'] += 1
+                    continue
+                read_latencies.append(time.perf_counter() - started)
+            conn.close()
+
+        reader_threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+        writer_threads = [threading.Thread(target=write_loop, args=(i,)) for i in range(writers)]
+        started = time.perf_counter()
+        for thread in reader_threads + writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for thread in reader_threads:
+            thread.join()
+        if writer is not None:
+            writer.queue.put(None)
+            writer.join()
+
+        write_ms = sorted(latency * 1000 for latency in write_latencies)
+        read_ms = sorted(latency * 1000 for latency in read_latencies)
+        return {
+            'submissions_per_s': round(len(write_ms) / elapsed, 1),
+            'write_p50_ms': round(percentile(write_ms, 0.5) or 0, 2),
+            'write_p99_ms': round(percentile(write_ms, 0.99) or 0, 2),
+            'reads_per_s': round(len(read_ms) / elapsed, 1),
+            'read_p99_ms': round(percentile(read_ms, 0.99) or 0, 2),
+            'lock_errors': errors['locked'],
+        }
+    finally:
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the default SQLite configuration with the production mode (WAL, tuned PRAGMAs, '
+        'batched single writer) under concurrent attempt writes and result-page reads.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=16, help='Concurrent submitting threads.')
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent result-page readers.')
+        parser.add_argument('--ops', type=int, default=100, help='Submissions (create + finalize) per writer.')
+        parser.add_argument('--rows', type=int, default=50000, help='Attempts preloaded into the table.')
+
+    def handle(self, *args, **options):
+        report = {
+            mode: run_benchmark(mode, options['writers'], options['readers'], options['ops'], options['rows'])
+            for mode in ('default', 'production')
+        }
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from exam_app.grading import abandoned_attempts, grade_attempt
+from exam_app.models import Attempt
+
+
+class Command(BaseCommand):
+    help = 'Finalizes or deletes attempts that were abandoned after their time ran out'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=60,
+                            help='Only touch attempts that expired at least this many minutes ago.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Run VACUUM afterwards to return freed pages (SQLite only).')
+
+    def handle(self, *args, **options):
+        graded = deleted = 0
+        for exam_id, attempts in abandoned_attempts(timedelta(minutes=options['older_than'])):
+            # Attempts with autosaved answers are graded as timed-out submissions.
+            answered = attempts.filter(responses__isnull=False).distinct()
+            empty = attempts.filter(responses__isnull=True)
+            if options['dry_run']:
+                graded += answered.count()
+                deleted += empty.count()
+                continue
+
+            while True:
+                batch = list(answered.select_related('exam')[:options['batch_size']])
+                if not batch:
+                    break
+                for attempt in batch:
+                    deadline = attempt.started_at + timedelta(minutes=attempt.exam.duration_minutes)
+                    grade_attempt(attempt, completed_at=deadline)
+                graded += len(batch)
+
+            while True:
+                ids = list(empty.values_list('id', flat=True)[:options['batch_size']])
+                if not ids:
+                    break
+                with transaction.atomic():
+                    Attempt.objects.filter(id__in=ids).delete()
+                deleted += len(ids)
+
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}Finalized {graded} answered attempts and deleted {deleted} empty ones.'
+        ))
+
+        if options['vacuum'] and not options['dry_run'] and connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+            self.stdout.write('Vacuumed database.')
@@ -0,0 +1,69 @@
+import csv
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from exam_app.duplicates import MinHasher, near_duplicate_groups, shingles
+from exam_app.models import Question
+
+
+class Command(BaseCommand):
+    help = (
+        'Finds groups of near-duplicate questions (text and options) with MinHash and '
+        'locality-sensitive hashing, in one pass over the question bank.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, help='Only look at this exam (defaults to the whole bank).')
+        parser.add_argument('--threshold', type=float, default=0.8,
+                            help='Minimum estimated Jaccard similarity of character 5-grams.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Questions hashed at a time.')
+        parser.add_argument('--output', help='Also write the groups to this CSV file.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        questions = Question.objects.order_by('id')
+        if options['exam']:
+            questions = questions.filter(exam_id=options['exam'])
+        rows = questions.values_list('id', 'text', 'option1', 'option2', 'option3', 'option4')
+
+        hasher = MinHasher()
+        ids, signatures, chunk = [], [], []
+
+        def flush():
+            signatures.append(hasher.signatures([shingles(' '.join(row[1:])) for row in chunk]))
+            chunk.clear()
+
+        for row in rows.iterator(chunk_size=options['chunk_size']):
+            ids.append(row[0])
+            chunk.append(row)
+            if len(chunk) == options['chunk_size']:
+                flush()
+        if chunk:
+            flush()
+        if not ids:
+            self.stdout.write('No questions to compare.')
+            return
+
+        groups = near_duplicate_groups(ids, np.concatenate(signatures), options['threshold'])
+        found = Question.objects.only('id', 'exam_id', 'text').in_bulk(
+            [question_id for group in groups for question_id in group]
+        )
+        for number, group in enumerate(groups, 1):
+            self.stdout.write(f'Group {number} ({len(group)} questions): {found[group[0]].text[:80]}')
+            for question_id in group:
+                self.stdout.write(f'  question {question_id} in exam {found[question_id].exam_id}')
+        if options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['group', 'question_id', 'exam_id', 'text'])
+                for number, group in enumerate(groups, 1):
+                    writer.writerows(
+                        [number, question_id, found[question_id].exam_id, found[question_id].text]
+                        for question_id in group
+                    )
+        self.stdout.write(self.style.SUCCESS(
+            f'Compared {len(ids)} questions in {time.perf_counter() - started:.1f}s; '
+            f'found {len(groups)} groups of near-duplicates.'
+        ))
@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import Q
+
+from exam_app.models import StudentProfile
+from exam_app.thumbnails import generate_thumbnail
+
+
+def _thumbnail(profile):
+    try:
+        return generate_thumbnail(profile), None
+    except Exception as e:
+        return None, e
+
+
+def _thumbnail_in_thread(profile):
+    try:
+        return _thumbnail(profile)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Creates WebP thumbnails for profile pictures that do not have one yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Images processed in parallel; 1 works in the calling thread.')
+        parser.add_argument('--force', action='store_true', help='Regenerate existing thumbnails too.')
+
+    def handle(self, *args, **options):
+        profiles = StudentProfile.objects.exclude(profile_pic='').exclude(profile_pic=None)
+        if not options['force']:
+            # Profiles from before the thumbnail column was added hold NULL.
+            profiles = profiles.filter(Q(thumbnail='') | Q(thumbnail__isnull=True))
+        profiles = list(profiles.only('id', 'profile_pic', 'thumbnail'))
+
+        created = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            if options['workers'] <= 1:
+                results = map(_thumbnail, profiles)
+            else:
+                results = pool.map(_thumbnail_in_thread, profiles)
+            for profile, (name, error) in zip(profiles, results):
+                if error is not None:
+                    failed += 1
+                    self.stderr.write(f'Profile {profile.id} ({profile.profile_pic.name}): {error}')
+                else:
+                    created += 1
+        self.stdout.write(self.style.SUCCESS(f'Created {created} thumbnails ({failed} failed).'))
@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from exam_app.grading import claim_jobs, requeue_stale_jobs, retry_failed_jobs, run_job
+from exam_app.models import GradingJob
+
+
+def _run_in_thread(job):
+    try:
+        return run_job(job)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Grades queued exam submissions with a pool of worker threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Number of grading threads.')
+        parser.add_argument('--batch-size', type=int, default=100, help='Jobs claimed per round.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Requeue running jobs older than this many seconds on startup.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained.')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Queue jobs that failed every retry again on startup.')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(timedelta(seconds=options['stale_after']))
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale jobs.'))
+        if options['retry_failed']:
+            self.stdout.write(f'Requeued {retry_failed_jobs()} failed jobs.')
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                jobs = claim_jobs(options['batch_size'])
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                started = time.perf_counter()
+                finished = list(pool.map(_run_in_thread, jobs))
+                graded = sum(1 for job in finished if job.status == GradingJob.DONE)
+                failed = sum(1 for job in finished if job.status == GradingJob.FAILED)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Graded {graded} submissions ({len(finished) - graded - failed} to retry, '
+                    f'{failed} failed) in {elapsed:.2f}s'
+                )
@@ -0,0 +1,161 @@
+import csv
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connections, transaction
+
+from exam_app.importers import StudentImportError, hash_passwords, read_chunks, validate_student_chunk
+from exam_app.management.commands.loadtest import _init_worker
+from exam_app.models import StudentProfile
+from exam_app.stats import adjust_student_count
+from exam_app.thumbnails import strip_metadata
+
+# Passwords sent to a worker process per job.
+HASH_BATCH = 50
+# Inserts of one batch, each after dropping emails registered meanwhile.
+INSERT_TRIES = 3
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates students from a CSV/Excel file with email, full_name and password columns '
+        '(and optionally profile_pic, a file name in --pictures). Passwords are hashed in worker '
+        'processes and users are inserted in batches. Rejected rows are written to a CSV report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='CSV or Excel file of students.')
+        parser.add_argument('--pictures', help='Directory holding the files named in the profile_pic column.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Password hashing processes.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Students per insert transaction.')
+        parser.add_argument('--rejects', help='Where to write rejected rows (defaults to <file>.rejects.csv).')
+
+    def handle(self, *args, **options):
+        if options['pictures'] and not os.path.isdir(options['pictures']):
+            raise CommandError(f"{options['pictures']} is not a directory.")
+        self.created = 0
+        self.rejected = []
+        self.started = time.perf_counter()
+
+        # Worker processes must not inherit this process's open connections.
+        connections.close_all()
+        with open(options['file'], 'rb') as file, ProcessPoolExecutor(
+            max_workers=options['workers'],
+            initializer=_init_worker,
+            initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'online_exam.settings'),),
+        ) as pool:
+            # Keep a couple of batches hashing while the oldest one is inserted.
+            pending = deque()
+            try:
+                for batch in self._validated(file, options['batch_size'], options['pictures']):
+                    rows = list(batch[['email', 'full_name', 'password']].itertuples(index=False, name=None))
+                    jobs = [pool.submit(hash_passwords, rows[i:i + HASH_BATCH]) for i in range(0, len(rows), HASH_BATCH)]
+                    pending.append((batch, jobs))
+                    if len(pending) > 2:
+                        self._insert(*pending.popleft(), options['pictures'])
+                while pending:
+                    self._insert(*pending.popleft(), options['pictures'])
+            except StudentImportError as e:
+                raise CommandError(str(e))
+
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {self.created} students in {elapsed:.1f}s '
+            f'({self.created / max(elapsed, 1e-9):,.0f}/s); rejected {len(self.rejected)} rows.'
+        ))
+        if self.rejected:
+            path = options['rejects'] or f"{options['file']}.rejects.csv"
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['row', 'email', 'error'])
+                writer.writerows(sorted(self.rejected))
+            self.stdout.write(self.style.WARNING(f'Wrote rejected rows to {path}'))
+        if options['pictures'] and self.created:
+            call_command('generate_thumbnails', stdout=self.stdout, stderr=self.stderr)
+
+    def _validated(self, file, batch_size, pictures_dir):
+        seen = set()
+        first_row = 2
+        for chunk in read_chunks(file, batch_size):
+            clean, errors = validate_student_chunk(chunk, first_row, seen, pictures_dir)
+            clean = clean.assign(row=clean.index + first_row)
+            first_row += len(chunk)
+            self.rejected.extend(errors)
+            if len(clean):
+                yield clean
+
+    def _insert(self, batch, jobs, pictures_dir):
+        hashes = [result for job in jobs for result in job.result()]
+        users, pictures = [], []
+        for (row, email, full_name, picture), (password, error) in zip(
+            batch[['row', 'email', 'full_name', 'profile_pic']].itertuples(index=False, name=None), hashes
+        ):
+            if error is not None:
+                self.rejected.append((row, email, error))
+                continue
+            try:
+                stored = self._store_picture(picture, pictures_dir) if pictures_dir and picture else None
+            except OSError:
+                # Includes Pillow's UnidentifiedImageError.
+                self.rejected.append((row, email, 'profile_pic is not a readable image'))
+                continue
+            users.append(User(username=email, email=email, first_name=full_name, password=password))
+            pictures.append(stored)
+
+        rows = dict(zip(batch['email'], batch['row']))
+        for tries in range(1, INSERT_TRIES + 1):
+            try:
+                self._create(users, pictures)
+                break
+            except IntegrityError as e:
+                # Someone registered one of these emails since the batch was validated.
+                taken = set(User.objects.filter(username__in=[user.username for user in users])
+                            .values_list('username', flat=True))
+                users, pictures = self._reject(
+                    rows, users, pictures, lambda user: user.username in taken,
+                    'a user with this email already exists',
+                )
+                if not taken or tries == INSERT_TRIES:
+                    # Failing for another reason, or emails keep being taken: give up on the batch.
+                    self._reject(rows, users, pictures, lambda user: True, f'could not be inserted: {e}')
+                    users = []
+                    break
+                for user in users:
+                    user.pk = None
+
+        self.created += len(users)
+        rate = self.created / max(time.perf_counter() - self.started, 1e-9)
+        self.stdout.write(f'  students: {self.created} created, {len(self.rejected)} rejected ({rate:,.0f} rows/s)')
+
+    def _reject(self, rows, users, pictures, rejected, error):
+        """Reject the ``rejected`` users, deleting their stored pictures; return the others."""
+        kept_users, kept_pictures = [], []
+        for user, picture in zip(users, pictures):
+            if rejected(user):
+                self.rejected.append((rows[user.username], user.username, error))
+                if picture:
+                    default_storage.delete(picture)
+            else:
+                kept_users.append(user)
+                kept_pictures.append(picture)
+        return kept_users, kept_pictures
+
+    def _create(self, users, pictures):
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            # bulk_create skips the signal that keeps this counter.
+            adjust_student_count(len(users))
+            StudentProfile.objects.bulk_create([
+                StudentProfile(user=user, profile_pic=picture) for user, picture in zip(users, pictures)
+            ])
+
+    def _store_picture(self, name, pictures_dir):
+        with open(os.path.join(pictures_dir, name), 'rb') as f:
+            picture = strip_metadata(f, name)
+        return default_storage.save(f'profile_pics/{picture.name}', picture)
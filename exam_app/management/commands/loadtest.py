@@ -0,0 +1,209 @@
+import json
+import os
+import random
+import re
+import subprocess
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from exam_app.models import Exam
+from exam_app.stats import recount_students
+
+ATTEMPT_RE = re.compile(r'/attempt/(\d+)/submit/')
+QUESTION_ORDER_RE = re.compile(r'<script id="question-order" type="application/json">([^<]*)</script>')
+WAITING_RE = re.compile(r'data-ticket="([^"]+)" data-wait="([\d.]+)"')
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _timed(client, samples, endpoint, method, path, data=None):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = getattr(client, method)(path, data or {})
+        elapsed = time.perf_counter() - started
+    samples.append({
+        'endpoint': endpoint,
+        'status': response.status_code,
+        'latency': elapsed,
+        'queries': len(queries.captured_queries),
+        'session_queries': sum('django_session' in query['sql'] for query in queries.captured_queries),
+    })
+    return response
+
+
+def question_order(html):
+    """The attempt's question ids, in the order the start page shows them."""
+    match = QUESTION_ORDER_RE.search(html)
+    return json.loads(match.group(1)) if match else []
+
+
+def simulate_student(username, password, exam_id, host, seed):
+    """Run one student through the full exam flow and return per-request samples."""
+    from django.test import Client
+    from django.urls import reverse
+
+    rng = random.Random(seed)
+    client = Client(HTTP_HOST=host)
+    samples = []
+    _timed(client, samples, 'login', 'post', reverse('login'), {'username': username, 'password': password})
+    _timed(client, samples, 'home', 'get', reverse('home'))
+    _timed(client, samples, 'exam_instructions', 'get', reverse('exam_instructions', args=[exam_id]))
+    page = _timed(client, samples, 'start_exam', 'get', reverse('start_exam', args=[exam_id]))
+    # Wait out the admission queue like the waiting-room page does.
+    while waiting := WAITING_RE.search(page.content.decode()):
+        time.sleep(float(waiting.group(2)))
+        page = _timed(client, samples, 'start_exam', 'get', reverse('start_exam', args=[exam_id]),
+                      {'ticket': waiting.group(1)})
+
+    html = page.content.decode()
+    attempt = ATTEMPT_RE.search(html)
+    if attempt:
+        # The page's script loads the questions from the paper endpoint.
+        _timed(client, samples, 'exam_paper', 'get', reverse('exam_paper', args=[attempt.group(1)]))
+        answers = {
+            f'question_{question_id}': str(rng.randint(1, 4))
+            for question_id in question_order(html)
+        }
+        _timed(client, samples, 'submit_exam', 'post', reverse('submit_exam', args=[attempt.group(1)]), answers)
+    _timed(client, samples, 'results', 'get', reverse('results'))
+    return samples
+
+
+def _run_student(*args):
+    try:
+        return simulate_student(*args)
+    finally:
+        connections.close_all()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(samples, wall_time):
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample['endpoint']].append(sample)
+
+    report = {}
+    for endpoint, rows in by_endpoint.items():
+        latencies = sorted(row['latency'] * 1000 for row in rows)
+        queries = [row['queries'] for row in rows]
+        session_queries = [row['session_queries'] for row in rows]
+        report[endpoint] = {
+            'requests': len(rows),
+            'errors': sum(1 for row in rows if row['status'] >= 400),
+            'throughput_rps': round(len(rows) / wall_time, 2) if wall_time else None,
+            'latency_ms': {
+                'p50': round(percentile(latencies, 0.50), 2),
+                'p95': round(percentile(latencies, 0.95), 2),
+                'p99': round(percentile(latencies, 0.99), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'queries': {
+                'mean': round(sum(queries) / len(queries), 2),
+                'max': max(queries),
+                'session_mean': round(sum(session_queries) / len(session_queries), 2),
+            },
+        }
+    return report
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Replays an exam-day traffic profile (login -> home -> instructions -> start -> paper -> submit -> results) '
+        'with simulated students in worker processes and reports latency and query counts as JSON. '
+        'Attempts are written to the configured database, so point it at a disposable copy.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50, help='Number of simulated students.')
+        parser.add_argument('--concurrency', type=int, default=os.cpu_count() or 4, help='Worker processes.')
+        parser.add_argument('--exam', type=int, help='Exam id to take (defaults to the first exam with questions).')
+        parser.add_argument('--password', default='loadtest-pass')
+        parser.add_argument('--host', default='localhost', help='Host header sent with each request.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        exam = self._get_exam(options['exam'])
+        usernames = self._ensure_students(options['students'], options['password'])
+
+        # Worker processes must not inherit this process's open connections.
+        connections.close_all()
+        started = time.perf_counter()
+        samples = []
+        with ProcessPoolExecutor(
+            max_workers=options['concurrency'],
+            initializer=_init_worker,
+            initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'online_exam.settings'),),
+        ) as pool:
+            futures = [
+                pool.submit(_run_student, username, options['password'], exam.id, options['host'],
+                            options['seed'] + i)
+                for i, username in enumerate(usernames)
+            ]
+            for future in futures:
+                samples.extend(future.result())
+        wall_time = time.perf_counter() - started
+
+        report = {
+            'commit': current_commit(),
+            'students': options['students'],
+            'concurrency': options['concurrency'],
+            'exam_id': exam.id,
+            'wall_time_s': round(wall_time, 3),
+            'endpoints': summarize(samples, wall_time),
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+            self.stdout.write(self.style.SUCCESS(f"Wrote report to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _get_exam(self, exam_id):
+        exams = Exam.objects.filter(questions__isnull=False).distinct()
+        exam = exams.filter(id=exam_id).first() if exam_id else exams.order_by('id').first()
+        if exam is None:
+            raise CommandError('No exam with questions found; run seed_data first or pass --exam.')
+        return exam
+
+    def _ensure_students(self, count, password):
+        usernames = [f'loadtest-{i}' for i in range(count)]
+        # One hash shared by every simulated student keeps setup fast.
+        password_hash = make_password(password)
+        User.objects.bulk_create(
+            [User(username=username, password=password_hash) for username in usernames],
+            ignore_conflicts=True,
+        )
+        User.objects.filter(username__in=usernames).update(password=password_hash)
+        # bulk_create skips the signal that keeps the dashboard's student count.
+        recount_students()
+        return usernames
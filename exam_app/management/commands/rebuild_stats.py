@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from exam_app.models import ExamStats, StudentStats
+from exam_app.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the per-exam and per-student statistics tables from scratch'
+
+    def handle(self, *args, **kwargs):
+        rebuild_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt stats for {ExamStats.objects.count()} exams and {StudentStats.objects.count()} students.'
+        ))
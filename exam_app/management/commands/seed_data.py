@@ -1,11 +1,121 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+import numpy as np
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from exam_app.models import Exam, Question
+from django.db import transaction
+from django.utils import timezone
+from exam_app.models import Attempt, Exam, Question
+from exam_app.stats import rebuild_stats
+
+WORDS = (
+    'which what how many largest smallest first capital planet river element formula year author '
+    'function value result ocean mountain language protocol theorem country process output binary '
+    'integer loop class variable equation energy velocity molecule organ empire battle painter'
+).split()
+DURATIONS = [10, 15, 20, 30, 45, 60, 90]
+MARKS = [1, 1, 1, 1, 2, 2, 4]
+
+
+def _rng(seed, *stream):
+    return np.random.default_rng([seed, *stream])
+
+
+def _zipf_weights(n, exponent, seed, stream):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    # Shuffle so popularity is not simply ordered by id.
+    _rng(seed, stream).shuffle(weights)
+    return weights / weights.sum()
+
+
+def generate_questions(seed, chunk, exam_ids, counts):
+    """Return question rows for the given exams, deterministic for (seed, chunk)."""
+    rng = _rng(seed, 1, chunk)
+    rows = []
+    for exam_id, count in zip(exam_ids, counts):
+        for _ in range(count):
+            words = rng.choice(WORDS, size=rng.integers(6, 14))
+            options = rng.choice(WORDS, size=(4, 2))
+            rows.append((
+                exam_id,
+                ' '.join(words).capitalize() + '?',
+                *(' '.join(option) for option in options),
+                int(rng.integers(1, 5)),
+                int(rng.choice(MARKS)),
+            ))
+    return rows
+
+
+def generate_attempts(seed, chunk, size, params):
+    """Return attempt rows for one chunk, deterministic for (seed, chunk)."""
+    rng = _rng(seed, 2, chunk)
+    exam_ids, exam_marks, exam_durations, student_ids, skew, now = params
+    exam_p = _zipf_weights(len(exam_ids), skew, seed, 10)
+    student_p = _zipf_weights(len(student_ids), skew / 2, seed, 11)
+    ability = _rng(seed, 12).normal(0, 1, len(student_ids))
+    difficulty = _rng(seed, 13).normal(0, 0.8, len(exam_ids))
+
+    exam_idx = rng.choice(len(exam_ids), size=size, p=exam_p)
+    student_idx = rng.choice(len(student_ids), size=size, p=student_p)
+    logits = ability[student_idx] - difficulty[exam_idx] + rng.normal(0, 0.5, size)
+    fraction = 1 / (1 + np.exp(-logits))
+    scores = np.round(fraction * exam_marks[exam_idx])
+    started = rng.uniform(0, 180 * 24 * 3600, size)
+    took = rng.uniform(0.3, 1.0, size) * exam_durations[exam_idx] * 60
+    submitted = rng.random(size) < 0.95
+    seeds = rng.integers(0, 2 ** 31, size)
+
+    rows = []
+    for i in range(size):
+        started_at = now - timedelta(seconds=float(started[i]))
+        rows.append((
+            int(student_ids[student_idx[i]]),
+            int(exam_ids[exam_idx[i]]),
+            started_at,
+            started_at + timedelta(seconds=float(took[i])) if submitted[i] else None,
+            float(scores[i]) if submitted[i] else 0.0,
+            bool(submitted[i]),
+            int(seeds[i]),
+        ))
+    return rows
+
+
+@contextmanager
+def _explicit_timestamps(model, field_name):
+    """Let bulk_create keep generated values for an auto_now_add field."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
 
 class Command(BaseCommand):
     help = 'Seeds initial data for the Online Exam System'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=0, help='Synthetic students to create.')
+        parser.add_argument('--exams', type=int, default=0, help='Synthetic exams to create.')
+        parser.add_argument('--questions', type=int, default=0,
+                            help='Synthetic questions in total, spread unevenly across the new exams.')
+        parser.add_argument('--attempts', type=int, default=0, help='Synthetic attempts to create.')
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Zipf exponent for exam popularity (students use half of it).')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert transaction.')
+        parser.add_argument('--workers', type=int, default=1, help='Processes used to generate rows.')
+
+    def handle(self, *args, **options):
+        self.seed_samples()
+        if any(options[name] for name in ('students', 'exams', 'questions', 'attempts')):
+            self.seed_synthetic(options)
+
+    def seed_samples(self):
         # Create Superuser
         if not User.objects.filter(username='admin').exists():
             User.objects.create_superuser('admin', 'admin@example.com', 'adminpass')
@@ -40,3 +150,121 @@ class Command(BaseCommand):
             Question.objects.create(exam=exam2, text='What is the result of 3 ** 2?', option1='6', option2='9', option3='27', option4='12', correct_answer=2)
             Question.objects.create(exam=exam2, text='Which keyword is used to define a function?', option1='func', option2='define', option3='def', option4='function', correct_answer=3)
             self.stdout.write(self.style.SUCCESS('Created Exam 2: Python Programming Basics'))
+
+    def seed_synthetic(self, options):
+        seed = options['seed']
+        batch_size = options['batch_size']
+        now = timezone.now()
+
+        student_ids = self.create_students(options['students'], seed, batch_size)
+        exam_ids, durations = self.create_exams(options['exams'], seed, batch_size, now)
+        exam_marks = self.create_questions(options['questions'], exam_ids, seed, batch_size, options['workers'])
+        if options['attempts']:
+            if not len(exam_ids) or not len(student_ids):
+                self.stdout.write(self.style.WARNING('Skipping attempts: they need --exams and --students.'))
+            else:
+                params = (exam_ids, exam_marks, durations, student_ids, options['skew'], now)
+                self.create_attempts(options['attempts'], params, seed, batch_size, options['workers'])
+
+        started = time.perf_counter()
+        rebuild_stats()
+        self.stdout.write(f'Rebuilt statistics in {time.perf_counter() - started:.1f}s')
+
+    def _insert(self, model, objects, label, total, started):
+        with transaction.atomic():
+            created = model.objects.bulk_create(objects, batch_size=1000)
+        self._created[label] = self._created.get(label, 0) + len(created)
+        rate = self._created[label] / max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(f'  {label}: {self._created[label]}/{total} ({rate:,.0f} rows/s)')
+        return created
+
+    def create_students(self, count, seed, batch_size):
+        self._created = {}
+        if not count:
+            return np.array([], dtype=np.int64)
+        # Every synthetic student shares one password hash ("student-pass").
+        password = make_password('student-pass')
+        started = time.perf_counter()
+        ids = []
+        for start in range(0, count, batch_size):
+            users = [
+                User(username=f'synthetic-{seed}-{i}', email=f'synthetic-{seed}-{i}@example.com',
+                     first_name=f'Student {i}', password=password)
+                for i in range(start, min(start + batch_size, count))
+            ]
+            ids.extend(user.pk for user in self._insert(User, users, 'students', count, started))
+        return np.array(ids, dtype=np.int64)
+
+    def create_exams(self, count, seed, batch_size, now):
+        if not count:
+            return np.array([], dtype=np.int64), np.array([])
+        rng = _rng(seed, 0)
+        durations = rng.choice(DURATIONS, size=count)
+        age = rng.uniform(0, 365 * 24 * 3600, size=count)
+        started = time.perf_counter()
+        ids = []
+        with _explicit_timestamps(Exam, 'created_at'):
+            for start in range(0, count, batch_size):
+                exams = [
+                    Exam(title=f'Synthetic Exam {seed}-{i}', description='Generated by seed_data.',
+                         duration_minutes=int(durations[i]), created_at=now - timedelta(seconds=float(age[i])))
+                    for i in range(start, min(start + batch_size, count))
+                ]
+                ids.extend(exam.pk for exam in self._insert(Exam, exams, 'exams', count, started))
+        return np.array(ids, dtype=np.int64), durations
+
+    def create_questions(self, total, exam_ids, seed, batch_size, workers):
+        marks = np.zeros(len(exam_ids))
+        if not total or not len(exam_ids):
+            return marks
+        # Question bank sizes are log-normally skewed across exams.
+        weights = _rng(seed, 3).lognormal(0, 1, len(exam_ids))
+        counts = _rng(seed, 4).multinomial(total, weights / weights.sum())
+
+        # Chunks hold whole exams so each chunk's rows can be generated independently.
+        chunks, current, size = [], [], 0
+        for index, count in enumerate(counts):
+            current.append(index)
+            size += count
+            if size >= batch_size:
+                chunks.append(current)
+                current, size = [], 0
+        if current:
+            chunks.append(current)
+
+        jobs = [(seed, n, exam_ids[chunk].tolist(), counts[chunk].tolist()) for n, chunk in enumerate(chunks)]
+        exam_index = {int(exam_id): i for i, exam_id in enumerate(exam_ids)}
+        started = time.perf_counter()
+        for rows in self._generate(generate_questions, jobs, workers):
+            questions = [
+                Question(exam_id=row[0], text=row[1], option1=row[2], option2=row[3],
+                         option3=row[4], option4=row[5], correct_answer=row[6], marks=row[7])
+                for row in rows
+            ]
+            for row in rows:
+                marks[exam_index[row[0]]] += row[7]
+            self._insert(Question, questions, 'questions', total, started)
+        return marks
+
+    def create_attempts(self, total, params, seed, batch_size, workers):
+        jobs = [
+            (seed, n, min(batch_size, total - start), params)
+            for n, start in enumerate(range(0, total, batch_size))
+        ]
+        started = time.perf_counter()
+        with _explicit_timestamps(Attempt, 'started_at'):
+            for rows in self._generate(generate_attempts, jobs, workers):
+                attempts = [
+                    Attempt(user_id=row[0], exam_id=row[1], started_at=row[2], completed_at=row[3],
+                            graded_at=row[3], score=row[4], is_submitted=row[5], seed=row[6])
+                    for row in rows
+                ]
+                self._insert(Attempt, attempts, 'attempts', total, started)
+
+    def _generate(self, func, jobs, workers):
+        if workers <= 1:
+            for job in jobs:
+                yield func(*job)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(func, *zip(*jobs))
@@ -0,0 +1,92 @@
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+logger = logging.getLogger('exam_app.metrics')
+
+# Metrics of the request being served; copied into sync_to_async threads.
+_current = ContextVar('exam_request_metrics', default=None)
+
+recent_requests = deque(maxlen=getattr(settings, 'EXAM_METRICS_BUFFER_SIZE', 1000))
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.rendering = False
+        self.started = time.perf_counter()
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper that charges each query to the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """``connection_created`` receiver adding :func:`record_query` once per connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def timed_render():
+    """Charge the time of the enclosed render, less SQL run meanwhile, to the current request.
+
+    Only the outermost render is timed, so templates rendered from inside
+    another one are not counted twice.
+    """
+    metrics = _current.get()
+    if metrics is None or metrics.rendering:
+        yield
+        return
+    metrics.rendering = True
+    started, sql_time = time.perf_counter(), metrics.sql_time
+    try:
+        yield
+    finally:
+        metrics.rendering = False
+        metrics.render_time += time.perf_counter() - started - (metrics.sql_time - sql_time)
+
+
+def start_request():
+    return _current.set(RequestMetrics())
+
+
+def finish_request(token, request, response):
+    metrics = _current.get()
+    _current.reset(token)
+    total = time.perf_counter() - metrics.started
+    match = request.resolver_match
+    record = {
+        'view': match.view_name if match else None,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'queries': metrics.queries,
+        'sql_ms': round(metrics.sql_time * 1000, 3),
+        'render_ms': round(metrics.render_time * 1000, 3),
+        # Everything else: view code, middleware and serialization.
+        'other_ms': round((total - metrics.sql_time - metrics.render_time) * 1000, 3),
+        'total_ms': round(total * 1000, 3),
+    }
+    recent_requests.append(record)
+    logger.info(
+        '%(view)s %(status)s queries=%(queries)d sql_ms=%(sql_ms).1f render_ms=%(render_ms).1f '
+        'other_ms=%(other_ms).1f',
+        record, extra={'metrics': record},
+    )
+    return record
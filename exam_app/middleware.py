@@ -0,0 +1,33 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import finish_request, start_request
+
+
+class QueryMetricsMiddleware:
+    """Record query count, SQL, template rendering and remaining time for every request.
+
+    Results go to the ``exam_app.metrics`` logger and to the in-memory ring
+    buffer ``exam_app.metrics.recent_requests``. Works for sync and async
+    views without forcing either into the other's mode.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = start_request()
+        response = self.get_response(request)
+        finish_request(token, request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = start_request()
+        response = await self.get_response(request)
+        finish_request(token, request, response)
+        return response
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0004_gradingjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(condition=models.Q(('is_submitted', True)), fields=['-completed_at', '-id'], name='attempt_submitted_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(condition=models.Q(('is_submitted', True)), fields=['exam', '-completed_at', '-id'], name='attempt_exam_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(condition=models.Q(('is_submitted', True)), fields=['user', '-completed_at', '-id'], name='attempt_user_recent_idx'),
+        ),
+    ]
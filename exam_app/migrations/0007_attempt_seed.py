@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:15
+
+from django.db import migrations, models
+import exam_app.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0006_attempt_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='seed',
+            field=models.PositiveIntegerField(default=exam_app.models.generate_seed),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0007_attempt_seed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(condition=models.Q(('is_submitted', False)), fields=['user', 'exam', '-started_at'], name='attempt_open_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(condition=models.Q(('is_submitted', False)), fields=['exam', 'started_at'], name='attempt_open_exam_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['exam', 'id', 'correct_answer', 'marks'], name='question_answer_key_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0008_attempt_question_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentprofile',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='profile_thumbs/'),
+        ),
+    ]
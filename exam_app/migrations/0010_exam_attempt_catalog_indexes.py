@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0009_studentprofile_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(condition=models.Q(('is_submitted', True)), fields=['user', 'exam', 'score'], name='attempt_user_exam_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['-created_at', '-id'], name='exam_created_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+# The SQL is spelled out rather than imported from exam_app.search, so the
+# migration keeps working however that module changes.
+CREATE_SEARCH_INDEX = [
+    "CREATE VIRTUAL TABLE exam_app_question_fts USING fts5("
+    "text, option1, option2, option3, option4, content='exam_app_question', "
+    "content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER exam_app_question_fts_ai AFTER INSERT ON exam_app_question BEGIN "
+    "INSERT INTO exam_app_question_fts(rowid, text, option1, option2, option3, option4) "
+    "VALUES (new.id, new.text, new.option1, new.option2, new.option3, new.option4); END",
+    "CREATE TRIGGER exam_app_question_fts_ad AFTER DELETE ON exam_app_question BEGIN "
+    "INSERT INTO exam_app_question_fts(exam_app_question_fts, rowid, text, option1, option2, option3, option4) "
+    "VALUES ('delete', old.id, old.text, old.option1, old.option2, old.option3, old.option4); END",
+    "CREATE TRIGGER exam_app_question_fts_au AFTER UPDATE OF text, option1, option2, option3, option4 "
+    "ON exam_app_question BEGIN "
+    "INSERT INTO exam_app_question_fts(exam_app_question_fts, rowid, text, option1, option2, option3, option4) "
+    "VALUES ('delete', old.id, old.text, old.option1, old.option2, old.option3, old.option4); "
+    "INSERT INTO exam_app_question_fts(rowid, text, option1, option2, option3, option4) "
+    "VALUES (new.id, new.text, new.option1, new.option2, new.option3, new.option4); END",
+    "INSERT INTO exam_app_question_fts(exam_app_question_fts) VALUES ('rebuild')",
+]
+DROP_SEARCH_INDEX = [
+    "DROP TRIGGER IF EXISTS exam_app_question_fts_ai",
+    "DROP TRIGGER IF EXISTS exam_app_question_fts_ad",
+    "DROP TRIGGER IF EXISTS exam_app_question_fts_au",
+    "DROP TABLE IF EXISTS exam_app_question_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SEARCH_INDEX:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SEARCH_INDEX:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0010_exam_attempt_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0011_question_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='question_set',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='stratify_by_marks',
+            field=models.BooleanField(default=False, help_text='Keep the share of questions worth each mark the same as in the full pool.'),
+        ),
+        migrations.AlterField(
+            model_name='exam',
+            name='total_questions',
+            field=models.PositiveIntegerField(default=0, help_text='Questions drawn at random for each attempt; 0 uses every question.'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+def backfill_graded_at(apps, schema_editor):
+    Attempt = apps.get_model('exam_app', 'Attempt')
+    Attempt.objects.filter(is_submitted=True).update(graded_at=models.F('completed_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0012_exam_question_sampling'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='graded_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(condition=models.Q(('is_submitted', True)), fields=['exam', 'graded_at'], name='attempt_exam_graded_idx'),
+        ),
+        migrations.RunPython(backfill_graded_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+def count_students(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    SiteStats = apps.get_model('exam_app', 'SiteStats')
+    SiteStats.objects.create(pk=1, student_count=User.objects.filter(is_staff=False).count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exam_app', '0014_gradingjob_retries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_students, migrations.RunPython.noop),
+    ]
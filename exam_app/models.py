@@ -1,23 +1,54 @@
+import random
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+# Seconds allowed past the exam duration for a submission to still arrive.
+SUBMIT_GRACE_SECONDS = 10
+
+
+def generate_seed():
+    return random.getrandbits(31)
+
 class StudentProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     profile_pic = models.ImageField(upload_to='profile_pics/', null=True, blank=True)
+    # Small WebP copy of profile_pic with a content-hashed name (see thumbnails.py).
+    thumbnail = models.ImageField(upload_to='profile_thumbs/', null=True, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
+    @property
+    def avatar_url(self):
+        """URL to show the picture at avatar size; the original until the thumbnail exists."""
+        if self.thumbnail:
+            return self.thumbnail.url
+        if self.profile_pic:
+            return self.profile_pic.url
+        return None
+
 
 class Exam(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     duration_minutes = models.PositiveIntegerField(default=30)
-    total_questions = models.PositiveIntegerField(default=0)
+    total_questions = models.PositiveIntegerField(
+        default=0, help_text='Questions drawn at random for each attempt; 0 uses every question.'
+    )
+    stratify_by_marks = models.BooleanField(
+        default=False, help_text='Keep the share of questions worth each mark the same as in the full pool.'
+    )
     pass_marks = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Keyset pagination of the student exam list, newest first.
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='exam_created_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -38,9 +69,19 @@ class Question(models.Model):
     correct_answer = models.PositiveIntegerField(choices=CHOICES)
     marks = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        indexes = [
+            # Covers the answer-key query, so it never reads question rows.
+            models.Index(fields=['exam', 'id', 'correct_answer', 'marks'], name='question_answer_key_idx'),
+        ]
+
     def __str__(self):
         return self.text[:50]
 
+    @property
+    def options(self):
+        return [self.option1, self.option2, self.option3, self.option4]
+
 class Attempt(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
@@ -48,6 +89,34 @@ class Attempt(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     score = models.FloatField(default=0)
     is_submitted = models.BooleanField(default=False)
+    # Seeds the question shuffle so the order can be rebuilt on resume.
+    seed = models.PositiveIntegerField(default=generate_seed)
+    # Packed ids of the questions drawn for this attempt (see sampling.py); null means every question.
+    question_set = models.BinaryField(null=True, editable=False)
+    # When grading committed; unlike completed_at (the deadline for expired
+    # attempts) it only grows, so item analysis can read new attempts by it.
+    graded_at = models.DateTimeField(null=True, editable=False)
+
+    class Meta:
+        # Partial indexes backing the keyset-paginated result listings.
+        indexes = [
+            models.Index(fields=['-completed_at', '-id'], condition=models.Q(is_submitted=True),
+                         name='attempt_submitted_recent_idx'),
+            models.Index(fields=['exam', '-completed_at', '-id'], condition=models.Q(is_submitted=True),
+                         name='attempt_exam_recent_idx'),
+            models.Index(fields=['user', '-completed_at', '-id'], condition=models.Q(is_submitted=True),
+                         name='attempt_user_recent_idx'),
+            models.Index(fields=['exam', 'graded_at'], condition=models.Q(is_submitted=True),
+                         name='attempt_exam_graded_idx'),
+            # Covers a student's per-exam attempt count and best score on the home page.
+            models.Index(fields=['user', 'exam', 'score'], condition=models.Q(is_submitted=True),
+                         name='attempt_user_exam_idx'),
+            # Unsubmitted attempts: resuming, pending grading and cleanup.
+            models.Index(fields=['user', 'exam', '-started_at'], condition=models.Q(is_submitted=False),
+                         name='attempt_open_user_idx'),
+            models.Index(fields=['exam', 'started_at'], condition=models.Q(is_submitted=False),
+                         name='attempt_open_exam_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.exam.title}"
@@ -59,3 +128,93 @@ class Attempt(models.Model):
         elapsed_time = (timezone.now() - self.started_at).total_seconds()
         remaining = (self.exam.duration_minutes * 60) - elapsed_time
         return max(0, int(remaining))
+
+    def question_order(self, question_ids):
+        order = sorted(question_ids)
+        random.Random(self.seed).shuffle(order)
+        return order
+
+
+class Response(models.Model):
+    attempt = models.ForeignKey(Attempt, on_delete=models.CASCADE, related_name='responses')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    # Null means the student cleared a previously saved answer.
+    selected_option = models.PositiveSmallIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['attempt', 'question'], name='unique_attempt_question_response'),
+        ]
+
+    def __str__(self):
+        return f"Attempt {self.attempt_id} - Q{self.question_id}: {self.selected_option}"
+
+
+class GradingJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    attempt = models.OneToOneField(Attempt, on_delete=models.CASCADE, related_name='grading_job')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    worker = models.CharField(max_length=64, blank=True)
+    submitted_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    # Failed runs so far, and when a job that failed may be claimed again.
+    tries = models.PositiveIntegerField(default=0)
+    retry_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='gradingjob_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Grading attempt {self.attempt_id} ({self.status})"
+
+
+class AttemptStats(models.Model):
+    attempt_count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0)
+    best_score = models.FloatField(default=0)
+    last_attempt_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def avg_score(self):
+        return self.score_sum / self.attempt_count if self.attempt_count else 0
+
+
+class ExamStats(AttemptStats):
+    exam = models.OneToOneField(Exam, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    question_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats for {self.exam_id}"
+
+
+class StudentStats(AttemptStats):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='exam_stats')
+
+    def __str__(self):
+        return f"Stats for user {self.user_id}"
+
+
+class SiteStats(models.Model):
+    """Single row of site-wide counters, kept up to date on write (see stats.py)."""
+    student_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Site stats ({self.student_count} students)"
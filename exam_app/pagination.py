@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+PAGE_SIZE = 50
+
+
+def encode_cursor(timestamp, pk):
+    return urlsafe_base64_encode(f'{timestamp.isoformat()}|{pk}'.encode())
+
+
+def decode_cursor(value):
+    """Return ``(timestamp, id)`` from a cursor, or None if it is malformed."""
+    try:
+        timestamp, pk = force_str(urlsafe_base64_decode(value)).split('|')
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (TypeError, ValueError):
+        return None
+
+
+def _page_query(queryset, cursor, page_size, field):
+    queryset = queryset.order_by(f'-{field}', '-id')
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        timestamp, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk})
+        )
+    return queryset[:page_size + 1]
+
+
+def _split_page(rows, page_size, field):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(getattr(rows[-1], field), rows[-1].id)
+    return rows, next_cursor
+
+
+def keyset_page(queryset, cursor=None, page_size=PAGE_SIZE, field='completed_at'):
+    """Return one page of rows, newest ``field`` first, and the cursor of the next.
+
+    Pages are addressed by the ``(field, id)`` of the last row seen rather
+    than an offset, so every page costs the same however deep it is.
+    """
+    return _split_page(list(_page_query(queryset, cursor, page_size, field)), page_size, field)
+
+
+async def akeyset_page(queryset, cursor=None, page_size=PAGE_SIZE, field='completed_at'):
+    """Async version of :func:`keyset_page`."""
+    rows = [row async for row in _page_query(queryset, cursor, page_size, field)]
+    return _split_page(rows, page_size, field)
@@ -0,0 +1,40 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+
+from .caching import exam_cache_key, versioned_timeout
+from .models import Question
+
+
+def paper_etag(exam_id, version, question_set=None):
+    """Strong ETag of the paper an attempt is shown at an exam version."""
+    questions = 'all' if question_set is None else hashlib.blake2b(question_set, digest_size=8).hexdigest()
+    return f'"paper-{exam_id}-{version}-{questions}"'
+
+
+def paper_json(exam_id, question_ids, version):
+    """Serialize the questions in ``question_ids`` for the client, without answers.
+
+    Each question is a ``[id, marks, text, option1, option2, option3, option4]``
+    row in id order, so the payload is the same for every student with the
+    same questions and compresses well. Rows are cached once per exam
+    version, so building a paper only joins strings.
+    """
+    keys = {
+        question_id: exam_cache_key(exam_id, f'paper_row:{question_id}', version)
+        for question_id in question_ids
+    }
+    rows = cache.get_many(keys.values())
+    missing = [question_id for question_id in question_ids if keys[question_id] not in rows]
+    if missing:
+        rendered = {
+            keys[question.id]: json.dumps(
+                [question.id, question.marks, question.text, *question.options], separators=(',', ':')
+            )
+            for question in Question.objects.filter(id__in=missing)
+        }
+        cache.set_many(rendered, versioned_timeout())
+        rows.update(rendered)
+    body = ','.join(rows[keys[question_id]] for question_id in sorted(question_ids) if keys[question_id] in rows)
+    return f'{{"exam":{exam_id},"version":{version},"questions":[{body}]}}'
@@ -0,0 +1,60 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Max
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
+
+from .catalog import CATALOG_PAGE_SIZE
+from .grading import pending_attempts
+from .models import Attempt, Exam, GradingJob, Question
+from .pagination import PAGE_SIZE
+
+# A plan line reading a whole table without an index, or sorting in a temp b-tree.
+_FULL_SCAN = re.compile(r'\bSCAN (\w+)\b(?! USING)')
+_TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def hot_querysets(user, exam):
+    """The querysets behind the busiest listings and lookups, keyed by name.
+
+    Mirrors what the views and helpers run so tests and ``bench_queries``
+    can check their plans.
+    """
+    page = PAGE_SIZE + 1
+    submitted = Attempt.objects.filter(is_submitted=True).order_by('-completed_at', '-id')
+    return {
+        'home_catalog': Exam.objects.annotate(question_count=Coalesce('stats__question_count', 0))
+        .order_by('-created_at', '-id')[:CATALOG_PAGE_SIZE + 1],
+        'home_status': Attempt.objects.filter(user=user, is_submitted=True, exam_id__in=[exam.id])
+        .values('exam_id').annotate(attempts=Count('id'), best_score=Max('score')).order_by(),
+        'results': submitted.filter(user=user)[:page],
+        'admin_results': submitted.select_related('user', 'exam')[:page],
+        'admin_results_by_exam': submitted.filter(exam=exam)[:page],
+        'admin_results_by_student': submitted.filter(user__username=user.username)[:page],
+        'admin_results_by_date': submitted.filter(completed_at__gte=timezone.now() - timedelta(days=7))[:page],
+        'admin_students': User.objects.filter(is_staff=False).select_related('profile').annotate(
+            attempt_count=Coalesce('exam_stats__attempt_count', 0),
+            avg_score=F('exam_stats__score_sum') / NullIf('exam_stats__attempt_count', 0),
+        ),
+        'resumable_attempt': Attempt.objects.filter(
+            user=user, exam=exam, is_submitted=False, grading_job=None,
+            started_at__gt=timezone.now() - timedelta(minutes=exam.duration_minutes),
+        ).order_by('-started_at')[:1],
+        'pending_attempts': pending_attempts(user),
+        'abandoned_attempts': Attempt.objects.filter(
+            exam=exam, is_submitted=False, grading_job=None, started_at__lt=timezone.now() - timedelta(hours=1)
+        ),
+        'answer_key': Question.objects.filter(exam=exam).values_list('id', 'correct_answer', 'marks'),
+        'grading_queue': GradingJob.objects.filter(status=GradingJob.PENDING).order_by('id')[:100],
+    }
+
+
+def plan_problems(queryset, allowed_scans=()):
+    """Return the EXPLAIN lines that scan a whole table or sort in a temp b-tree."""
+    return [
+        line for line in queryset.explain().splitlines()
+        if _TEMP_SORT in line
+        or any(table not in allowed_scans for table in _FULL_SCAN.findall(line))
+    ]
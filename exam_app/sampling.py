@@ -0,0 +1,67 @@
+import numpy as np
+from django.core.cache import cache
+
+from .caching import exam_cache_key, versioned_timeout
+from .scoring import get_answer_key, pack_question_ids
+
+
+def question_pool(exam_id):
+    """Return an exam's question ids sorted by (marks, id) and the slice of each mark.
+
+    Built from the cached answer key once per exam version, so drawing a
+    paper neither reads the Question table nor copies the pool.
+    """
+    key = exam_cache_key(exam_id, 'question_pool')
+    pool = cache.get(key)
+    if pool is None:
+        answer_key = get_answer_key(exam_id)
+        ids = np.fromiter(answer_key, dtype=np.int64, count=len(answer_key))
+        marks = np.fromiter((marks for _, marks in answer_key.values()), dtype=np.int64, count=len(answer_key))
+        order = np.lexsort((ids, marks))
+        ids, marks = ids[order], marks[order]
+        starts = np.flatnonzero(np.r_[True, marks[1:] != marks[:-1]]) if len(marks) else np.empty(0, dtype=np.int64)
+        stops = np.r_[starts[1:], len(ids)]
+        pool = (ids, list(zip(starts.tolist(), stops.tolist())))
+        cache.set(key, pool, versioned_timeout())
+    return pool
+
+
+def questions_per_attempt(exam, pool_size):
+    if exam.total_questions and exam.total_questions < pool_size:
+        return exam.total_questions
+    return pool_size
+
+
+def allocate(count, sizes):
+    """Split ``count`` draws across strata in proportion to their sizes (largest remainder)."""
+    sizes = np.asarray(sizes)
+    quotas = count * sizes / sizes.sum()
+    counts = np.floor(quotas).astype(np.int64)
+    counts[np.argsort(counts - quotas, kind='stable')[:count - counts.sum()]] += 1
+    return counts
+
+
+def sample_questions(exam, seed):
+    """Draw the question ids for a new attempt, or None when it gets every question.
+
+    Draws index positions in the cached pool without replacement, so the
+    cost grows with ``exam.total_questions`` rather than with the pool.
+    """
+    ids, strata = question_pool(exam.id)
+    count = questions_per_attempt(exam, len(ids))
+    if count == len(ids):
+        return None
+    rng = np.random.default_rng(seed)
+    if exam.stratify_by_marks:
+        positions = np.concatenate([
+            start + rng.choice(stop - start, size=drawn, replace=False)
+            for (start, stop), drawn in zip(strata, allocate(count, [stop - start for start, stop in strata]))
+        ])
+    else:
+        positions = rng.choice(len(ids), size=count, replace=False)
+    return np.sort(ids[positions])
+
+
+def draw_question_set(exam, seed):
+    """``Attempt.question_set`` for a new attempt at ``exam``."""
+    return pack_question_ids(sample_questions(exam, seed))
@@ -0,0 +1,73 @@
+import numpy as np
+from django.core.cache import cache
+
+from .caching import exam_cache_key, versioned_timeout
+from .models import Question
+
+
+def pack_question_ids(question_ids):
+    """Encode the ids drawn for an attempt for ``Attempt.question_set``."""
+    if question_ids is None:
+        return None
+    return np.asarray(question_ids, dtype='<i8').tobytes()
+
+
+def unpack_question_ids(question_set):
+    return np.frombuffer(question_set, dtype='<i8').tolist()
+
+
+def get_answer_key(exam_id, question_set=None):
+    """Return ``{question_id: (correct_option, marks)}`` for an exam.
+
+    The key is compiled once per exam version and served from the cache, so
+    scoring a submission does not touch the Question table. Given an
+    attempt's ``question_set``, only the questions drawn for it are included.
+    """
+    key = exam_cache_key(exam_id, 'answer_key')
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = {
+            question_id: (correct_answer, marks)
+            for question_id, correct_answer, marks in Question.objects.filter(
+                exam_id=exam_id
+            ).values_list('id', 'correct_answer', 'marks')
+        }
+        cache.set(key, answer_key, versioned_timeout())
+    if question_set is not None:
+        # Questions deleted since the attempt started no longer count.
+        answer_key = {
+            question_id: answer_key[question_id]
+            for question_id in unpack_question_ids(question_set)
+            if question_id in answer_key
+        }
+    return answer_key
+
+
+def answers_from_post(data):
+    """Extract ``{question_id: option}`` from ``question_<id>`` form fields."""
+    answers = {}
+    for field, value in data.items():
+        if not field.startswith('question_'):
+            continue
+        try:
+            answers[int(field[9:])] = int(value)
+        except (TypeError, ValueError):
+            continue
+    return answers
+
+
+def score_answers(exam_id, answers, question_set=None):
+    answer_key = get_answer_key(exam_id, question_set)
+    score = 0
+    correct_count = 0
+    for question_id, selected_option in answers.items():
+        entry = answer_key.get(question_id)
+        if entry is not None and selected_option == entry[0]:
+            score += entry[1]
+            correct_count += 1
+    return {
+        'score': score,
+        'correct_count': correct_count,
+        'total_marks': sum(marks for _, marks in answer_key.values()),
+        'total_questions': len(answer_key),
+    }
@@ -0,0 +1,78 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Question
+
+# An external-content FTS5 index over exam_app_question, created by migration
+# 0011 and kept in sync by triggers on every insert, update and delete.
+FTS_TABLE = 'exam_app_question_fts'
+FTS_COLUMNS = ['text', 'option1', 'option2', 'option3', 'option4']
+# bm25 weights per column: a match in the question text counts most.
+FTS_WEIGHTS = (10.0, 1.0, 1.0, 1.0, 1.0)
+SEARCH_LIMIT = 50
+
+# Highlight markers, swapped for <mark> after the snippet is escaped.
+_START, _END = '\x02', '\x03'
+
+
+def search_available():
+    return connection.vendor == 'sqlite'
+
+
+def fts_query(terms):
+    """Turn free text into an FTS5 query matching every word, the last as a prefix.
+
+    Words are quoted so FTS5 operators and punctuation in the input are
+    taken literally. Returns '' if there is nothing to search for.
+    """
+    words = re.findall(r'\w+', terms)
+    if not words:
+        return ''
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def matching_ids(terms):
+    """SQL and params selecting the ids of questions matching ``terms``, for ``id__in``."""
+    return f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [fts_query(terms)]
+
+
+def _highlight(snippet):
+    return mark_safe(escape(snippet).replace(_START, '<mark>').replace(_END, '</mark>'))
+
+
+def search_questions(terms, exam_id=None, limit=SEARCH_LIMIT):
+    """Return up to ``limit`` ``(question, snippet)`` pairs for ``terms``, best match first.
+
+    On SQLite the FTS5 index ranks matches with bm25. Other databases fall
+    back to an unranked ``icontains`` filter on the text and options.
+    """
+    if not search_available():
+        words = Q()
+        for word in re.findall(r'\w+', terms):
+            words &= Q(*[Q(**{f'{column}__icontains': word}) for column in FTS_COLUMNS], _connector=Q.OR)
+        if not words:
+            return []
+        questions = Question.objects.filter(words).select_related('exam').order_by('id')
+        if exam_id is not None:
+            questions = questions.filter(exam_id=exam_id)
+        return [(question, question.text) for question in questions[:limit]]
+
+    query = fts_query(terms)
+    if not query:
+        return []
+    sql = (
+        f"SELECT q.id, snippet({FTS_TABLE}, -1, %s, %s, '…', 16) "
+        f"FROM {FTS_TABLE} JOIN exam_app_question q ON q.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s {'AND q.exam_id = %s ' if exam_id is not None else ''}"
+        f"ORDER BY bm25({FTS_TABLE}, {', '.join(map(str, FTS_WEIGHTS))}) LIMIT %s"
+    )
+    params = [_START, _END, query, *([exam_id] if exam_id is not None else []), limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    questions = Question.objects.select_related('exam').in_bulk([question_id for question_id, _ in rows])
+    return [(questions[question_id], _highlight(snippet)) for question_id, snippet in rows if question_id in questions]
@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_catalog_version, bump_exam_version, bump_on_commit
+from .models import Exam, ExamStats, Question
+from .stats import adjust_question_count, adjust_student_count
+
+
+@receiver(pre_save, sender=Question)
+def remember_previous_exam(sender, instance, raw=False, **kwargs):
+    """Note which exam a saved question belonged to, so a move updates both exams."""
+    instance._previous_exam_id = None
+    if instance.pk and not raw:
+        instance._previous_exam_id = (
+            Question.objects.filter(pk=instance.pk).values_list('exam_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_exam_cache(sender, instance, **kwargs):
+    bump_on_commit(bump_exam_version, instance.exam_id)
+    previous = getattr(instance, '_previous_exam_id', None)
+    if previous is not None and previous != instance.exam_id:
+        bump_on_commit(bump_exam_version, previous)
+
+
+@receiver(post_save, sender=Question)
+def count_new_question(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_exam_id', None)
+    if created:
+        adjust_question_count(instance.exam_id, 1)
+        bump_on_commit(bump_catalog_version)
+    elif previous is not None and previous != instance.exam_id:
+        # Moved to another exam.
+        adjust_question_count(previous, -1)
+        adjust_question_count(instance.exam_id, 1)
+        bump_on_commit(bump_catalog_version)
+
+
+@receiver(post_delete, sender=Question)
+def count_deleted_question(sender, instance, origin=None, **kwargs):
+    # Deleting the exam deletes its ExamStats row, so there is nothing to adjust.
+    if isinstance(origin, Exam) or getattr(origin, 'model', None) is Exam:
+        return
+    adjust_question_count(instance.exam_id, -1)
+    bump_on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Exam)
+def invalidate_exam_paper(sender, instance, created, **kwargs):
+    if not created:
+        bump_on_commit(bump_exam_version, instance.id)
+
+
+@receiver(post_save, sender=Exam)
+def create_exam_stats(sender, instance, created, **kwargs):
+    if created:
+        ExamStats.objects.get_or_create(exam=instance)
+
+
+@receiver(post_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+def invalidate_catalog(sender, instance, **kwargs):
+    bump_on_commit(bump_catalog_version)
+
+
+@receiver(pre_save, sender=User)
+def remember_staff_flag(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Note whether a saved user was staff, so a change moves the student count."""
+    instance._was_staff = None
+    if instance.pk and not raw and (update_fields is None or 'is_staff' in update_fields):
+        instance._was_staff = User.objects.filter(pk=instance.pk).values_list('is_staff', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def count_students(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_staff = getattr(instance, '_was_staff', None)
+    if created and not instance.is_staff:
+        adjust_student_count(1)
+    elif was_staff is not None and was_staff != instance.is_staff:
+        adjust_student_count(1 if was_staff else -1)
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_student(sender, instance, **kwargs):
+    if not instance.is_staff:
+        adjust_student_count(-1)
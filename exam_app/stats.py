@@ -0,0 +1,111 @@
+from django.apps import apps as global_apps
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import ExamStats, SiteStats, StudentStats
+
+
+def _record(model, lookup, score, completed_at):
+    def update():
+        return model.objects.filter(**lookup).update(
+            attempt_count=F('attempt_count') + 1,
+            score_sum=F('score_sum') + score,
+            best_score=Greatest(F('best_score'), score),
+            last_attempt_at=Greatest(Coalesce(F('last_attempt_at'), completed_at), completed_at),
+        )
+
+    if update():
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(
+                attempt_count=1, score_sum=score, best_score=score,
+                last_attempt_at=completed_at, **lookup
+            )
+    except IntegrityError:
+        # A concurrent first attempt created the row in the meantime.
+        update()
+
+
+def record_attempt(attempt):
+    """Fold a newly graded attempt into the exam and student aggregates.
+
+    Must run in the same transaction that marks the attempt submitted.
+    """
+    _record(ExamStats, {'exam_id': attempt.exam_id}, attempt.score, attempt.completed_at)
+    _record(StudentStats, {'user_id': attempt.user_id}, attempt.score, attempt.completed_at)
+
+
+def adjust_question_count(exam_id, delta):
+    ExamStats.objects.filter(exam_id=exam_id).update(question_count=F('question_count') + delta)
+
+
+SITE_STATS_PK = 1
+
+
+def _count_students(user_model=User):
+    return user_model.objects.filter(is_staff=False).count()
+
+
+def recount_students():
+    """Count the students afresh, for bulk inserts that cannot tell how many rows they added."""
+    SiteStats.objects.update_or_create(pk=SITE_STATS_PK, defaults={'student_count': _count_students()})
+
+
+def adjust_student_count(delta):
+    """Add ``delta`` to the stored number of students, counting them if the row is missing."""
+    if not SiteStats.objects.filter(pk=SITE_STATS_PK).update(student_count=F('student_count') + delta):
+        recount_students()
+
+
+def student_count():
+    """Number of non-staff users, read from the counter row."""
+    count = SiteStats.objects.filter(pk=SITE_STATS_PK).values_list('student_count', flat=True).first()
+    if count is None:
+        count = _count_students()
+        SiteStats.objects.get_or_create(pk=SITE_STATS_PK, defaults={'student_count': count})
+    return count
+
+
+def rebuild_stats(apps=global_apps):
+    """Recompute every ExamStats/StudentStats row and the site counters from the source tables."""
+    Exam = apps.get_model('exam_app', 'Exam')
+    Question = apps.get_model('exam_app', 'Question')
+    Attempt = apps.get_model('exam_app', 'Attempt')
+    exam_stats_model = apps.get_model('exam_app', 'ExamStats')
+    student_stats_model = apps.get_model('exam_app', 'StudentStats')
+
+    submitted = Attempt.objects.filter(is_submitted=True)
+    aggregates = dict(
+        attempt_count=Count('id'),
+        score_sum=Sum('score'),
+        best_score=Max('score'),
+        last_attempt_at=Max('completed_at'),
+    )
+    by_exam = {row.pop('exam_id'): row for row in submitted.values('exam_id').annotate(**aggregates)}
+    question_counts = dict(Question.objects.values('exam_id').annotate(n=Count('id')).values_list('exam_id', 'n'))
+
+    with transaction.atomic():
+        exam_stats_model.objects.all().delete()
+        student_stats_model.objects.all().delete()
+        exam_stats_model.objects.bulk_create([
+            exam_stats_model(exam_id=exam_id, question_count=question_counts.get(exam_id, 0), **by_exam.get(exam_id, {}))
+            for exam_id in Exam.objects.values_list('id', flat=True).iterator()
+        ], batch_size=1000)
+        student_stats_model.objects.bulk_create(
+            (
+                student_stats_model(**row)
+                for row in submitted.values('user_id').annotate(**aggregates).order_by().iterator()
+            ),
+            batch_size=1000,
+        )
+        try:
+            site_stats_model = apps.get_model('exam_app', 'SiteStats')
+        except LookupError:
+            # Migrations from before the SiteStats table call this too.
+            return
+        site_stats_model.objects.update_or_create(
+            pk=SITE_STATS_PK, defaults={'student_count': _count_students(apps.get_model('auth', 'User'))}
+        )
@@ -1,7 +1,46 @@
-from django.test import TestCase, Client
+import asyncio
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
-from .models import Exam, Question, Attempt
+from django.utils import timezone
+from .management.commands.loadtest import question_order, simulate_student, summarize
+from .management.commands.seed_data import generate_questions
+from .importers import QuestionImportError, import_questions
+from . import urls as exam_urls
+from .admission import admission_ticket, make_ticket
+from .analytics import item_analysis, item_statistics
+from .duplicates import MinHasher, near_duplicate_groups, shingles
+from .autosave import response_buffer
+from .caching import exam_cache_key
+from .catalog import catalog_page
+from .metrics import recent_requests
+from .grading import claim_jobs, finalize_submission, grade_attempt, retry_failed_jobs, run_job
+from .models import Exam, ExamStats, Question, Attempt, GradingJob, Response, StudentProfile, StudentStats
+from .pagination import encode_cursor, keyset_page
+from .queryplans import hot_querysets, plan_problems
+from .stats import rebuild_stats, student_count
+from .sampling import allocate, sample_questions
+from .scoring import get_answer_key, pack_question_ids, score_answers, unpack_question_ids
+from .search import search_questions
+from .thumbnails import THUMBNAIL_SIZE, generate_thumbnail
+from .timer import make_timer_token
+from .writer import WriteQueue
 
 class ScoringTest(TestCase):
     def setUp(self):
@@ -46,3 +85,1436 @@ class ScoringTest(TestCase):
         
         attempt.refresh_from_db()
         self.assertEqual(attempt.score, 2)
+
+
+class AnswerKeyCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cachestudent', password='password123')
+        self.exam = Exam.objects.create(title='Cache Test', duration_minutes=10)
+        self.q1 = Question.objects.create(
+            exam=self.exam, text='3 + 3?',
+            option1='5', option2='6', option3='7', option4='8',
+            correct_answer=2, marks=2
+        )
+        self.client.login(username='cachestudent', password='password123')
+
+    def test_answer_key_is_cached(self):
+        get_answer_key(self.exam.id)
+        with self.assertNumQueries(0):
+            result = score_answers(self.exam.id, {self.q1.id: 2})
+        self.assertEqual(result['score'], 2)
+        self.assertEqual(result['total_marks'], 2)
+
+    def test_question_save_invalidates_answer_key(self):
+        get_answer_key(self.exam.id)
+        self.q1.correct_answer = 3
+        self.q1.save()
+        self.assertEqual(score_answers(self.exam.id, {self.q1.id: 3})['score'], 2)
+
+        Question.objects.create(
+            exam=self.exam, text='4 + 4?',
+            option1='6', option2='7', option3='8', option4='9',
+            correct_answer=3, marks=1
+        )
+        self.assertEqual(score_answers(self.exam.id, {})['total_marks'], 3)
+
+    def test_key_cached_before_commit_is_retired(self):
+        get_answer_key(self.exam.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.q1.correct_answer = 3
+            self.q1.save()
+            # A request outside the transaction still sees the old row and
+            # caches it under the version bumped by the save.
+            cache.set(exam_cache_key(self.exam.id, 'answer_key'), {self.q1.id: (2, 2)}, None)
+        self.assertEqual(get_answer_key(self.exam.id), {self.q1.id: (3, 2)})
+
+    @override_settings(EXAM_CACHE_TIMEOUT=60)
+    def test_per_process_cache_expires_changes_made_elsewhere(self):
+        get_answer_key(self.exam.id)
+        # Another process edits the question; its version bump never reaches this cache.
+        Question.objects.filter(pk=self.q1.pk).update(correct_answer=3)
+        self.assertEqual(get_answer_key(self.exam.id), {self.q1.id: (2, 2)})
+        later = time.time() + 61
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            self.assertEqual(get_answer_key(self.exam.id), {self.q1.id: (3, 2)})
+
+    def test_moving_a_question_invalidates_both_exams(self):
+        other = Exam.objects.create(title='Other', duration_minutes=10)
+        get_answer_key(self.exam.id)
+        get_answer_key(other.id)
+        self.q1.exam = other
+        self.q1.save()
+        self.assertEqual(get_answer_key(self.exam.id), {})
+        self.assertEqual(get_answer_key(other.id), {self.q1.id: (2, 2)})
+        counts = dict(ExamStats.objects.values_list('exam_id', 'question_count'))
+        self.assertEqual((counts[self.exam.id], counts[other.id]), (0, 1))
+
+    def test_submit_ignores_malformed_answers(self):
+        attempt = Attempt.objects.create(user=self.user, exam=self.exam)
+        self.client.post(reverse('submit_exam', args=[attempt.id]), {
+            f'question_{self.q1.id}': '2',
+            'question_abc': '1',
+            'question_999': 'x',
+        })
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, 2)
+
+
+class QuestionImportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.exam = Exam.objects.create(title='Import Test', duration_minutes=10)
+
+    def test_csv_import_reports_bad_rows(self):
+        csv = (
+            "text,option1,option2,option3,option4,correct_answer,marks\n"
+            "1 + 1?,1,2,3,4,2,1\n"
+            "No options?,,,,,1,1\n"
+            "Bad answer?,a,b,c,d,7,1\n"
+            "2 + 2?,2,3,4,5,3,\n"
+        )
+        upload = SimpleUploadedFile('questions.csv', csv.encode())
+        report = import_questions(self.exam, upload, chunk_size=2)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([row for row, _ in report.errors], [3, 4])
+        self.assertIn('options', report.errors[0][1])
+        self.assertEqual(list(self.exam.questions.order_by('id').values_list('marks', flat=True)), [1, 1])
+        self.assertEqual(score_answers(self.exam.id, {})['total_questions'], 2)
+
+    def test_unreadable_later_chunk_imports_nothing(self):
+        csv = (
+            "text,option1,option2,option3,option4,correct_answer\n"
+            "1 + 1?,1,2,3,4,2\n"
+            "2 + 2?,2,3,4,5,3\n"
+            "3 + 3?,5,6,7,8,2\n"
+            "Broken,a,b,c,d,1,1,extra,fields\n"
+        )
+        upload = SimpleUploadedFile('questions.csv', csv.encode())
+        with self.assertRaises(Exception):
+            import_questions(self.exam, upload, chunk_size=2)
+        self.assertFalse(self.exam.questions.exists())
+        self.assertEqual(score_answers(self.exam.id, {})['total_questions'], 0)
+
+        staff = User.objects.create_user(username='uploader', password='password123', is_staff=True)
+        self.client.force_login(staff)
+        upload.seek(0)
+        response = self.client.post(reverse('upload_questions'), {'exam': self.exam.id, 'file': upload})
+        self.assertContains(response, 'No questions were imported')
+        self.assertFalse(self.exam.questions.exists())
+
+    def test_xlsx_import(self):
+        from io import BytesIO
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['text', 'option1', 'option2', 'option3', 'option4', 'correct_answer'])
+        sheet.append(['Capital of France?', 'London', 'Paris', 'Rome', 'Berlin', 2])
+        sheet.append(['Numbers?', 1, 2, 3, 4, 4])
+        buffer = BytesIO()
+        workbook.save(buffer)
+
+        report = import_questions(self.exam, SimpleUploadedFile('questions.xlsx', buffer.getvalue()))
+        self.assertEqual(report.created, 2)
+        self.assertEqual(report.errors, [])
+        self.assertEqual(self.exam.questions.get(text='Numbers?').option1, '1')
+
+    def test_missing_columns_rejected(self):
+        upload = SimpleUploadedFile('questions.csv', b"text,option1\nQ,A\n")
+        with self.assertRaises(QuestionImportError):
+            import_questions(self.exam, upload)
+        self.assertFalse(self.exam.questions.exists())
+
+
+class AutosaveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='autosaver', password='password123')
+        self.exam = Exam.objects.create(title='Autosave Test', duration_minutes=10)
+        self.q1 = Question.objects.create(
+            exam=self.exam, text='1 + 1?',
+            option1='1', option2='2', option3='3', option4='4',
+            correct_answer=2, marks=1
+        )
+        self.q2 = Question.objects.create(
+            exam=self.exam, text='2 + 2?',
+            option1='2', option2='3', option3='4', option4='5',
+            correct_answer=3, marks=1
+        )
+        self.attempt = Attempt.objects.create(user=self.user, exam=self.exam)
+        self.client.login(username='autosaver', password='password123')
+
+    def test_autosaves_are_coalesced_until_flush(self):
+        url = reverse('autosave_answers', args=[self.attempt.id])
+        self.client.post(url, {f'question_{self.q1.id}': '1'})
+        response = self.client.post(url, {f'question_{self.q1.id}': '2', f'question_{self.q2.id}': '4', 'question_999': '1'})
+        self.assertEqual(response.json(), {'saved': 2})
+        self.assertFalse(Response.objects.exists())
+
+        self.assertEqual(response_buffer.flush(self.attempt.id), 2)
+        saved = dict(Response.objects.values_list('question_id', 'selected_option'))
+        self.assertEqual(saved, {self.q1.id: 2, self.q2.id: 4})
+
+        self.client.post(url, {f'question_{self.q2.id}': ''})
+        response_buffer.flush(self.attempt.id)
+        self.assertIsNone(Response.objects.get(question=self.q2).selected_option)
+
+    def test_submit_persists_final_answers(self):
+        self.client.post(reverse('autosave_answers', args=[self.attempt.id]), {f'question_{self.q2.id}': '1'})
+        self.client.post(reverse('submit_exam', args=[self.attempt.id]), {
+            f'question_{self.q1.id}': '2',
+            f'question_{self.q2.id}': '3',
+        })
+        self.assertEqual(len(response_buffer), 0)
+        saved = dict(self.attempt.responses.values_list('question_id', 'selected_option'))
+        self.assertEqual(saved, {self.q1.id: 2, self.q2.id: 3})
+
+    def test_submit_counts_autosaved_answers_missing_from_form(self):
+        self.client.post(reverse('autosave_answers', args=[self.attempt.id]), {f'question_{self.q1.id}': '2'})
+        response = self.client.post(reverse('submit_exam', args=[self.attempt.id]), {f'question_{self.q2.id}': '3'})
+        self.assertEqual(response.context['score'], 2)
+
+    def test_late_flush_keeps_submitted_answers(self):
+        self.client.post(reverse('autosave_answers', args=[self.attempt.id]), {f'question_{self.q1.id}': '1'})
+        finalize_submission(self.attempt, {self.q1.id: 2})
+        self.assertEqual(response_buffer.flush(), 0)
+        self.assertEqual(Response.objects.get(attempt=self.attempt).selected_option, 2)
+
+    def test_autosave_rejects_submitted_attempt(self):
+        self.attempt.is_submitted = True
+        self.attempt.save()
+        response = self.client.post(reverse('autosave_answers', args=[self.attempt.id]), {f'question_{self.q1.id}': '2'})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(EXAM_ASYNC_GRADING=True)
+class AsyncGradingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='queued', password='password123')
+        self.exam = Exam.objects.create(title='Queue Test', duration_minutes=10)
+        self.q1 = Question.objects.create(
+            exam=self.exam, text='1 + 1?',
+            option1='1', option2='2', option3='3', option4='4',
+            correct_answer=2, marks=3
+        )
+        self.attempt = Attempt.objects.create(user=self.user, exam=self.exam)
+        self.client.login(username='queued', password='password123')
+
+    def test_submission_is_queued_then_graded(self):
+        url = reverse('submit_exam', args=[self.attempt.id])
+        response = self.client.post(url, {f'question_{self.q1.id}': '2'})
+        self.assertRedirects(response, reverse('results'))
+
+        self.attempt.refresh_from_db()
+        self.assertFalse(self.attempt.is_submitted)
+        page = self.client.get(reverse('results'))
+        self.assertContains(page, 'Grading')
+        self.assertContains(page, '<title>Past Results - Online Exam System</title>')
+        self.assertContains(page, 'window.location.reload', count=1)
+
+        duplicate = self.client.post(url, {f'question_{self.q1.id}': '1'})
+        self.assertRedirects(duplicate, reverse('results'))
+        self.assertEqual(GradingJob.objects.count(), 1)
+
+        jobs = claim_jobs(10)
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(claim_jobs(10), [])
+        self.assertEqual(run_job(jobs[0]).status, GradingJob.DONE)
+
+        self.attempt.refresh_from_db()
+        self.assertTrue(self.attempt.is_submitted)
+        self.assertEqual(self.attempt.score, 3)
+        self.assertEqual(self.attempt.completed_at, jobs[0].submitted_at)
+
+    def test_failed_jobs_are_retried_then_reported(self):
+        self.client.post(reverse('submit_exam', args=[self.attempt.id]), {f'question_{self.q1.id}': '2'})
+        with mock.patch('exam_app.grading.grade_attempt', side_effect=RuntimeError('grader down')):
+            job = run_job(claim_jobs(10)[0])
+            self.assertEqual((job.status, job.tries), (GradingJob.PENDING, 1))
+            # Not claimed again until the backoff has passed.
+            self.assertEqual(claim_jobs(10), [])
+            for _ in range(4):
+                GradingJob.objects.update(retry_at=timezone.now())
+                job = run_job(claim_jobs(10)[0])
+            self.assertEqual((job.status, job.tries, job.error), (GradingJob.FAILED, 5, 'grader down'))
+        self.assertEqual(claim_jobs(10), [])
+
+        page = self.client.get(reverse('results'))
+        self.assertContains(page, 'Grading failed')
+        self.assertNotContains(page, 'window.location.reload')
+
+        self.assertEqual(retry_failed_jobs(), 1)
+        self.assertEqual(run_job(claim_jobs(10)[0]).status, GradingJob.DONE)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.score, 3)
+
+
+class ResultsPaginationTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='staff', password='password123', is_staff=True)
+        self.student = User.objects.create_user(username='student', password='password123')
+        self.other = User.objects.create_user(username='other', password='password123')
+        self.exam = Exam.objects.create(title='Paging Test')
+        self.other_exam = Exam.objects.create(title='Other Exam')
+        now = timezone.now()
+        # Several attempts share a completed_at to exercise the id tie-breaker.
+        for i in range(7):
+            Attempt.objects.create(
+                user=self.student, exam=self.exam, is_submitted=True,
+                completed_at=now - timezone.timedelta(minutes=i // 2), score=i
+            )
+        Attempt.objects.create(user=self.other, exam=self.other_exam, is_submitted=True, completed_at=now)
+        Attempt.objects.create(user=self.student, exam=self.exam, is_submitted=False)
+
+    def test_keyset_pages_cover_every_row_once(self):
+        queryset = Attempt.objects.filter(is_submitted=True)
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = keyset_page(queryset, cursor, page_size=3)
+            seen.extend(attempt.id for attempt in rows)
+            if not cursor:
+                break
+        expected = list(queryset.order_by('-completed_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_admin_results_filters(self):
+        self.client.login(username='staff', password='password123')
+        response = self.client.get(reverse('admin_results'), {'student': 'other'})
+        self.assertEqual([a.user_id for a in response.context['attempts']], [self.other.id])
+
+        response = self.client.get(reverse('admin_results'), {'exam': self.exam.id})
+        self.assertEqual(len(response.context['attempts']), 7)
+        self.assertIsNone(response.context['next_query'])
+
+    def test_student_results_only_lists_own_attempts(self):
+        self.client.login(username='other', password='password123')
+        response = self.client.get(reverse('results'))
+        self.assertEqual([a.exam_id for a in response.context['attempts']], [self.other_exam.id])
+
+
+class StatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='staff', password='password123', is_staff=True)
+        self.user = User.objects.create_user(username='statstudent', password='password123')
+        self.exam = Exam.objects.create(title='Stats Test', duration_minutes=10)
+        self.q1 = Question.objects.create(
+            exam=self.exam, text='1 + 1?',
+            option1='1', option2='2', option3='3', option4='4',
+            correct_answer=2, marks=4
+        )
+        self.client.login(username='statstudent', password='password123')
+
+    def submit(self, option):
+        attempt = Attempt.objects.create(user=self.user, exam=self.exam)
+        self.client.post(reverse('submit_exam', args=[attempt.id]), {f'question_{self.q1.id}': option})
+
+    def test_stats_follow_submissions(self):
+        self.submit('2')
+        self.submit('1')
+
+        exam_stats = ExamStats.objects.get(exam=self.exam)
+        self.assertEqual((exam_stats.attempt_count, exam_stats.score_sum, exam_stats.best_score), (2, 4, 4))
+        self.assertEqual(exam_stats.question_count, 1)
+        self.assertEqual(StudentStats.objects.get(user=self.user).avg_score, 2)
+
+        incremental = list(ExamStats.objects.values_list('exam_id', 'attempt_count', 'score_sum', 'best_score', 'question_count'))
+        rebuild_stats()
+        self.assertEqual(
+            list(ExamStats.objects.values_list('exam_id', 'attempt_count', 'score_sum', 'best_score', 'question_count')),
+            incremental
+        )
+
+    def test_concurrent_grading_is_recorded_once(self):
+        attempt = Attempt.objects.create(user=self.user, exam=self.exam)
+        stale = Attempt.objects.get(pk=attempt.pk)
+        self.assertEqual(finalize_submission(attempt, {self.q1.id: 2})['score'], 4)
+        self.assertIsNone(finalize_submission(stale, {self.q1.id: 1}))
+        self.assertIsNone(grade_attempt(stale))
+        self.assertEqual(ExamStats.objects.get(exam=self.exam).attempt_count, 1)
+        self.assertEqual(Response.objects.get(attempt=attempt).selected_option, 2)
+
+    def test_first_attempts_racing_for_a_stats_row(self):
+        real_filter = StudentStats.objects.filter
+        raced = []
+
+        def racing_filter(**kwargs):
+            # Another submission creates the row after this one found none.
+            if not raced:
+                raced.append(True)
+                StudentStats.objects.bulk_create([StudentStats(user=self.user, attempt_count=1, score_sum=4, best_score=4)])
+                return StudentStats.objects.none()
+            return real_filter(**kwargs)
+
+        with mock.patch.object(StudentStats.objects, 'filter', racing_filter):
+            self.submit('1')
+        stats = StudentStats.objects.get(user=self.user)
+        self.assertEqual((stats.attempt_count, stats.score_sum, stats.best_score), (2, 4, 4))
+
+    def test_admin_pages_read_stats(self):
+        self.submit('2')
+        self.client.login(username='staff', password='password123')
+        dashboard = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(dashboard.context['total_attempts'], 1)
+        self.assertEqual(dashboard.context['total_questions'], 1)
+
+        students = list(self.client.get(reverse('admin_students')).context['students'])
+        self.assertEqual([(s.attempt_count, s.avg_score) for s in students], [(1, 4)])
+
+    def test_student_count_is_kept_on_write(self):
+        def dashboard_count():
+            with CaptureQueriesContext(connection) as queries:
+                count = self.client.get(reverse('admin_dashboard')).context['total_students']
+            self.assertFalse(any('FROM "auth_user"' in q['sql'] and 'COUNT' in q['sql']
+                                 for q in queries.captured_queries))
+            return count
+
+        self.client.login(username='staff', password='password123')
+        self.assertEqual(dashboard_count(), 1)
+        other = User.objects.create_user(username='another', password='password123')
+        self.assertEqual(dashboard_count(), 2)
+        other.is_staff = True
+        other.save()
+        self.assertEqual(dashboard_count(), 1)
+        self.user.delete()
+        self.assertEqual(dashboard_count(), 0)
+        rebuild_stats()
+        self.assertEqual(dashboard_count(), 0)
+
+
+class ExamPaperTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='paperstudent', password='password123')
+        self.exam = Exam.objects.create(title='Paper Test', duration_minutes=10)
+        self.q1 = Question.objects.create(
+            exam=self.exam, text='Largest planet?',
+            option1='Mars', option2='Jupiter', option3='Venus', option4='Earth',
+            correct_answer=2, marks=2
+        )
+        self.q2 = Question.objects.create(
+            exam=self.exam, text='Smallest planet?',
+            option1='Mercury', option2='Mars', option3='Venus', option4='Earth',
+            correct_answer=1
+        )
+        self.client.login(username='paperstudent', password='password123')
+
+    def start(self):
+        response = self.client.get(reverse('start_exam', args=[self.exam.id]))
+        return response.context['attempt'], reverse('exam_paper', args=[response.context['attempt'].id])
+
+    def test_paper_is_compact_json_without_answers(self):
+        attempt, url = self.start()
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['questions'], [
+            [self.q1.id, 2, 'Largest planet?', 'Mars', 'Jupiter', 'Venus', 'Earth'],
+            [self.q2.id, 1, 'Smallest planet?', 'Mercury', 'Mars', 'Venus', 'Earth'],
+        ])
+        self.assertNotIn('correct', response.content.decode())
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        # The start page only carries the attempt's order, not the questions.
+        page = self.client.get(reverse('start_exam', args=[self.exam.id]))
+        self.assertEqual(sorted(question_order(page.content.decode())), [self.q1.id, self.q2.id])
+        self.assertNotContains(page, 'Jupiter')
+
+        other = User.objects.create_user(username='other', password='password123')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_reconnect_gets_not_modified(self):
+        _, url = self.start()
+        etag = self.client.get(url)['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(any('exam_app_question' in q['sql'] for q in queries.captured_queries))
+
+    def test_question_edit_changes_etag(self):
+        _, url = self.start()
+        etag = self.client.get(url)['ETag']
+        self.q1.option2 = 'Saturn'
+        self.q1.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Saturn')
+        self.assertNotContains(response, 'Jupiter')
+
+
+class ResumeAttemptTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='resumer', password='password123')
+        self.exam = Exam.objects.create(title='Resume Test', duration_minutes=10)
+        self.questions = [
+            Question.objects.create(
+                exam=self.exam, text=f'Question {i}?',
+                option1='a', option2='b', option3='c', option4='d',
+                correct_answer=1
+            )
+            for i in range(6)
+        ]
+        self.client.login(username='resumer', password='password123')
+
+    def test_refresh_resumes_attempt_in_same_order(self):
+        url = reverse('start_exam', args=[self.exam.id])
+        first = self.client.get(url)
+        attempt = first.context['attempt']
+        Response.objects.create(attempt=attempt, question=self.questions[0], selected_option=3)
+
+        second = self.client.get(url)
+        self.assertEqual(second.context['attempt'].id, attempt.id)
+        self.assertEqual(first.context['question_ids'], second.context['question_ids'])
+        self.assertEqual(second.context['saved_answers'], {f'question_{self.questions[0].id}': 3})
+        self.assertEqual(Attempt.objects.count(), 1)
+
+    def test_expired_attempt_is_not_resumed(self):
+        old = Attempt.objects.create(user=self.user, exam=self.exam)
+        Attempt.objects.filter(id=old.id).update(started_at=timezone.now() - timezone.timedelta(minutes=11))
+        response = self.client.get(reverse('start_exam', args=[self.exam.id]))
+        self.assertNotEqual(response.context['attempt'].id, old.id)
+
+    def test_cleanup_grades_answered_and_deletes_empty_attempts(self):
+        expired = timezone.now() - timezone.timedelta(hours=3)
+        empty = Attempt.objects.create(user=self.user, exam=self.exam)
+        answered = Attempt.objects.create(user=self.user, exam=self.exam)
+        live = Attempt.objects.create(user=self.user, exam=self.exam)
+        Attempt.objects.filter(id__in=[empty.id, answered.id]).update(started_at=expired)
+        Response.objects.create(attempt=answered, question=self.questions[0], selected_option=1)
+
+        call_command('cleanup_attempts', stdout=StringIO())
+
+        self.assertFalse(Attempt.objects.filter(id=empty.id).exists())
+        answered.refresh_from_db()
+        self.assertTrue(answered.is_submitted)
+        self.assertEqual(answered.score, 1)
+        self.assertTrue(Attempt.objects.filter(id=live.id, is_submitted=False).exists())
+
+
+class AsyncExamViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='async', password='password123')
+        self.exam = Exam.objects.create(title='Async Test', duration_minutes=10)
+        self.question = Question.objects.create(
+            exam=self.exam, text='1 + 1?',
+            option1='1', option2='2', option3='3', option4='4',
+            correct_answer=2
+        )
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    async def test_exam_flow_under_async_client(self):
+        response = await self.async_client.get(reverse('start_exam', args=[self.exam.id]))
+        self.assertEqual(response.status_code, 200)
+        attempt = response.context['attempt']
+
+        response = await self.async_client.post(
+            reverse('submit_exam', args=[attempt.id]), {f'question_{self.question.id}': '2'}
+        )
+        self.assertEqual(response.context['score'], 1)
+        response = await self.async_client.get(reverse('results'))
+        self.assertEqual([a.id for a in response.context['attempts']], [attempt.id])
+
+    async def test_anonymous_user_is_redirected_to_login(self):
+        response = await self.async_client_class().get(reverse('results'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_timer_sync_uses_no_queries(self):
+        response = self.client.get(reverse('start_exam', args=[self.exam.id]))
+        attempt = response.context['attempt']
+        token = response.context['timer_token']
+        Attempt.objects.filter(id=attempt.id).update(started_at=attempt.started_at - timezone.timedelta(minutes=4))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('timer_sync'), {'token': token})
+        # The token, not the database, is the source of truth for the start time.
+        self.assertEqual(response.json()['attempt'], attempt.id)
+        self.assertGreater(response.json()['time_remaining'], 590)
+        self.assertIn('no-store', response['Cache-Control'])
+
+        response = self.client.get(reverse('timer_sync'), {'token': token[:-2] + 'xx'})
+        self.assertEqual(response.status_code, 400)
+
+
+class LoadTestHarnessTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='simulated', password='password123')
+        self.exam = Exam.objects.create(title='Load Test', duration_minutes=10)
+        Question.objects.create(
+            exam=self.exam, text='1 + 1?',
+            option1='1', option2='2', option3='3', option4='4',
+            correct_answer=2
+        )
+
+    def test_simulated_student_completes_flow(self):
+        samples = simulate_student('simulated', 'password123', self.exam.id, 'testserver', 1)
+        self.assertEqual(
+            [sample['endpoint'] for sample in samples],
+            ['login', 'home', 'exam_instructions', 'start_exam', 'exam_paper', 'submit_exam', 'results']
+        )
+        self.assertTrue(all(sample['status'] < 400 for sample in samples))
+        self.assertTrue(Attempt.objects.filter(user__username='simulated', is_submitted=True).exists())
+
+        report = summarize(samples, wall_time=1.0)
+        self.assertEqual(report['submit_exam']['requests'], 1)
+        self.assertGreater(report['submit_exam']['queries']['max'], 0)
+
+
+class SyntheticSeedTest(TestCase):
+    def test_generates_requested_volumes(self):
+        call_command(
+            'seed_data', students=20, exams=4, questions=40, attempts=100, batch_size=30,
+            stdout=StringIO()
+        )
+        synthetic = Exam.objects.filter(title__startswith='Synthetic')
+        self.assertEqual(User.objects.filter(username__startswith='synthetic-').count(), 20)
+        self.assertEqual(synthetic.count(), 4)
+        self.assertEqual(Question.objects.filter(exam__in=synthetic).count(), 40)
+        self.assertEqual(Attempt.objects.filter(exam__in=synthetic).count(), 100)
+        self.assertEqual(ExamStats.objects.filter(exam__in=synthetic).aggregate(n=Sum('question_count'))['n'], 40)
+
+    def test_generation_is_reproducible(self):
+        self.assertEqual(
+            generate_questions(7, 0, [1, 2], [3, 2]),
+            generate_questions(7, 0, [1, 2], [3, 2])
+        )
+
+
+@override_settings(EXAM_WRITE_QUEUE=True)
+class WriteQueueTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='writer', password='password123')
+        self.exam = Exam.objects.create(title='Writer', duration_minutes=10)
+        self.queue = WriteQueue(max_wait=0.05)
+
+    def test_concurrent_writes_are_committed(self):
+        def create(_):
+            return self.queue.submit(Attempt.objects.create, user=self.user, exam=self.exam).pk
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(create, range(20)))
+        self.assertEqual(len(set(ids)), 20)
+        self.assertEqual(Attempt.objects.filter(exam=self.exam).count(), 20)
+
+    def test_failed_write_does_not_roll_back_others(self):
+        attempt = self.queue.submit(Attempt.objects.create, user=self.user, exam=self.exam)
+        with self.assertRaises(IntegrityError):
+            self.queue.submit(Attempt.objects.create, pk=attempt.pk, user=self.user, exam=self.exam)
+        self.queue.submit(Attempt.objects.create, user=self.user, exam=self.exam)
+        self.assertEqual(Attempt.objects.filter(exam=self.exam).count(), 2)
+
+    def test_async_writes_are_batched(self):
+        batches = []
+        next_batch = self.queue._next_batch
+
+        def record():
+            batch = next_batch()
+            batches.append(len(batch))
+            return batch
+
+        async def create_many():
+            return await asyncio.gather(*[
+                self.queue.asubmit(Attempt.objects.create, user=self.user, exam=self.exam) for _ in range(10)
+            ])
+
+        with mock.patch.object(self.queue, '_next_batch', record):
+            attempts = async_to_sync(create_many)()
+        self.assertEqual(len({attempt.pk for attempt in attempts}), 10)
+        self.assertGreater(max(batches), 1)
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='staff', password='password123', is_staff=True)
+        self.student = User.objects.create_user(username='exporter', password='password123')
+        self.exam = Exam.objects.create(title='Export Test', duration_minutes=10)
+        self.other = Exam.objects.create(title='Other', duration_minutes=10)
+        Question.objects.create(
+            exam=self.exam, text='Capital, of France?',
+            option1='London', option2='Paris', option3='Rome', option4='Berlin',
+            correct_answer=2, marks=2
+        )
+        for exam in (self.exam, self.exam, self.other):
+            Attempt.objects.create(
+                user=self.student, exam=exam, score=1, is_submitted=True, completed_at=timezone.now()
+            )
+        self.client.force_login(self.admin)
+
+    def test_results_csv_is_streamed_and_filtered(self):
+        response = self.client.get(reverse('admin_results_export'), {'exam': self.exam.id, 'format': 'csv'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'attempt_id,student,exam,score,started_at,completed_at')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(all(',exporter,Export Test,' in line for line in lines[1:]))
+
+    def test_results_xlsx(self):
+        from io import BytesIO
+        from openpyxl import load_workbook
+
+        response = self.client.get(reverse('admin_results_export'), {'format': 'xlsx'})
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(rows[0][0], 'attempt_id')
+        self.assertEqual(len(rows), 4)
+
+    def test_question_export_can_be_reimported(self):
+        response = self.client.get(reverse('admin_exam_questions_export', args=[self.exam.id]))
+        content = b''.join(response.streaming_content)
+        report = import_questions(self.other, SimpleUploadedFile('questions.csv', content))
+        self.assertEqual(report.created, 1)
+        question = self.other.questions.get()
+        self.assertEqual((question.text, question.correct_answer, question.marks), ('Capital, of France?', 2, 2))
+
+    def test_students_cannot_export(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('admin_results_export'))
+        self.assertEqual(response.status_code, 302)
+
+
+class ItemAnalysisTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='analysed', password='password123')
+        self.exam = Exam.objects.create(title='Analysis Test', duration_minutes=10)
+        self.questions = [
+            Question.objects.create(
+                exam=self.exam, text=f'Question {i}?',
+                option1='a', option2='b', option3='c', option4='d',
+                correct_answer=1, marks=marks
+            )
+            for i, marks in enumerate([1, 1, 2])
+        ]
+
+    def submit(self, choices):
+        now = timezone.now()
+        attempt = Attempt.objects.create(
+            user=self.user, exam=self.exam, is_submitted=True, completed_at=now, graded_at=now
+        )
+        Response.objects.bulk_create([
+            Response(attempt=attempt, question=question, selected_option=choice)
+            for question, choice in zip(self.questions, choices) if choice is not None
+        ])
+        return attempt
+
+    def test_statistics_match_direct_computation(self):
+        choices = [[1, 1, 1], [1, 2, 1], [2, 2, 1], [1, None, 3], [3, 2, None]]
+        for row in choices:
+            self.submit(row)
+
+        correct = np.array([[c == 1 for c in row] for row in choices], dtype=float)
+        scores = correct * np.array([1, 1, 2])
+        totals = scores.sum(axis=1)
+
+        analysis = item_analysis(self.exam.id)
+        self.assertEqual(analysis['attempts'], 5)
+        self.assertEqual([item['difficulty'] for item in analysis['items']], list(correct.mean(axis=0)))
+        rest = totals - scores[:, 0]
+        self.assertAlmostEqual(analysis['items'][0]['discrimination'], np.corrcoef(correct[:, 0], rest)[0, 1])
+        expected_alpha = 3 / 2 * (1 - scores.var(axis=0).sum() / totals.var())
+        self.assertAlmostEqual(analysis['alpha'], expected_alpha)
+        self.assertEqual(analysis['items'][1]['options'], [1, 3, 0, 0])
+        self.assertEqual(analysis['items'][1]['unanswered'], 1)
+
+    def test_new_attempts_are_added_incrementally(self):
+        self.submit([1, 1, 1])
+        self.assertEqual(item_statistics(self.exam.id).attempts, 1)
+        self.submit([2, 2, 2])
+        with CaptureQueriesContext(connection) as queries:
+            stats = item_statistics(self.exam.id)
+        self.assertEqual(stats.attempts, 2)
+        self.assertFalse(any('exam_app_question' in q['sql'] for q in queries.captured_queries))
+        # Unchanged data is not counted twice.
+        self.assertEqual(item_statistics(self.exam.id).attempts, 2)
+
+        # Editing the questions starts the statistics over.
+        Question.objects.create(
+            exam=self.exam, text='New?', option1='a', option2='b', option3='c', option4='d', correct_answer=1
+        )
+        stats = item_statistics(self.exam.id)
+        self.assertEqual((stats.attempts, len(stats.question_ids)), (2, 4))
+
+    def test_late_graded_attempts_are_added(self):
+        self.submit([1, 1, 1])
+        item_statistics(self.exam.id)
+        # Graded after the statistics were built, but completed at a deadline
+        # well before the overlap window.
+        late = Attempt.objects.create(user=self.user, exam=self.exam)
+        Response.objects.create(attempt=late, question=self.questions[0], selected_option=2)
+        grade_attempt(late, completed_at=timezone.now() - timezone.timedelta(days=1))
+        stats = item_statistics(self.exam.id)
+        self.assertEqual(stats.attempts, 2)
+        self.assertEqual(stats.options[0].tolist(), [0, 1, 1, 0, 0])
+
+    def test_admin_page(self):
+        self.submit([1, 2, 1])
+        staff = User.objects.create_user(username='analyst', password='password123', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('admin_exam_analysis', args=[self.exam.id]))
+        self.assertContains(response, 'Question 2?')
+        self.assertEqual(response.context['analysis']['attempts'], 1)
+
+
+# Maximum queries per URL. Each URL is measured at every size in
+# QueryBudgetTest.SIZES and must issue the same number of queries at each.
+QUERY_BUDGETS = {
+    'landing': 0,
+    'home': 5,
+    'register': 0,
+    'login': 0,
+    'exam_instructions': 5,
+    'start_exam': 6,
+    'exam_paper': 4,
+    'autosave_answers': 3,
+    'timer_sync': 0,
+    'admission_status': 0,
+    'results': 5,
+    'admin_dashboard': 6,
+    'admin_exams': 4,
+    'admin_exam_create': 3,
+    'admin_exam_edit': 4,
+    'admin_exam_questions': 5,
+    'admin_exam_analysis': 8,
+    'admin_exam_questions_export': 4,
+    'admin_question_search': 6,
+    'admin_students': 4,
+    'admin_results': 5,
+    'admin_results_export': 3,
+    'upload_questions': 4,
+    # These change the data, so they run last.
+    'submit_exam': 20,
+    'admin_question_delete': 7,
+    'admin_exam_delete': 12,
+    'logout': 4,
+}
+
+
+class QueryBudgetTest(TestCase):
+    SIZES = (2, 12)
+
+    def populate(self, size):
+        """Build a dataset whose row counts scale with ``size``."""
+        tag = f's{size}'
+        staff = User.objects.create_user(username=f'staff-{tag}', password='password123', is_staff=True)
+        student = User.objects.create_user(username=f'student-{tag}', password='password123')
+        others = [User.objects.create_user(username=f'other-{tag}-{i}', password='x') for i in range(size)]
+        exams = [Exam.objects.create(title=f'Budget {tag} {i}', duration_minutes=10) for i in range(size)]
+        for exam in exams:
+            questions = [
+                Question.objects.create(
+                    exam=exam, text=f'Q{i}?', option1='a', option2='b', option3='c', option4='d', correct_answer=1
+                )
+                for i in range(size)
+            ]
+            for user in [student, *others]:
+                for _ in range(size if user is student else 1):
+                    attempt = Attempt.objects.create(
+                        user=user, exam=exam, is_submitted=True, score=1, completed_at=timezone.now()
+                    )
+                    Response.objects.bulk_create([
+                        Response(attempt=attempt, question=question, selected_option=1) for question in questions
+                    ])
+        exam = exams[0]
+        attempt = Attempt.objects.create(user=student, exam=exam)
+        attempt.exam = exam
+        return {
+            'staff': staff, 'student': student, 'exam': exam, 'attempt': attempt,
+            'question': exam.questions.first(), 'answers': {
+                f'question_{question.id}': '1' for question in exam.questions.all()
+            },
+        }
+
+    def request_for(self, name, data):
+        """Return ``(user, method, path, payload)`` for one URL."""
+        args = {
+            'exam_instructions': [data['exam'].id], 'start_exam': [data['exam'].id],
+            'admin_exam_edit': [data['exam'].id], 'admin_exam_delete': [data['exam'].id],
+            'admin_exam_questions': [data['exam'].id], 'admin_exam_analysis': [data['exam'].id],
+            'admin_exam_questions_export': [data['exam'].id],
+            'submit_exam': [data['attempt'].id], 'autosave_answers': [data['attempt'].id],
+            'exam_paper': [data['attempt'].id],
+            'admin_question_delete': [data['question'].id],
+        }.get(name, [])
+        path = reverse(name, args=args)
+        if name in ('landing', 'register', 'login', 'timer_sync', 'admission_status'):
+            user = None
+        elif name.startswith('admin_') or name == 'upload_questions':
+            user = data['staff']
+        else:
+            user = data['student']
+        method, payload = 'get', {}
+        if name in ('submit_exam', 'autosave_answers'):
+            method, payload = 'post', data['answers']
+        elif name == 'logout':
+            method = 'post'
+        elif name == 'timer_sync':
+            payload = {'token': make_timer_token(data['attempt'])}
+        elif name == 'admin_question_search':
+            payload = {'q': 'Q1'}
+        elif name == 'admission_status':
+            payload = {'ticket': make_ticket(data['student'].id, data['exam'].id, 0)}
+        return user, method, path, payload
+
+    def count_queries(self, name, data):
+        user, method, path, payload = self.request_for(name, data)
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        cache.clear()
+        # Warm per-exam caches so the steady state is measured.
+        get_answer_key(data['exam'].id)
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(path, payload)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, name)
+        return len(queries)
+
+    def test_every_url_has_a_budget(self):
+        names = {pattern.name for pattern in exam_urls.urlpatterns}
+        self.assertEqual(names, set(QUERY_BUDGETS))
+
+    def test_query_counts_are_bounded_and_constant(self):
+        counts = {name: [] for name in QUERY_BUDGETS}
+        for size in self.SIZES:
+            # Each size is measured on its own, rolled back afterwards.
+            with transaction.atomic():
+                data = self.populate(size)
+                for name in QUERY_BUDGETS:
+                    counts[name].append(self.count_queries(name, data))
+                transaction.set_rollback(True)
+        for name, budget in QUERY_BUDGETS.items():
+            with self.subTest(url=name):
+                self.assertEqual(len(set(counts[name])), 1, f'{name} queries grow with data: {counts[name]}')
+                self.assertLessEqual(counts[name][0], budget)
+
+    def test_middleware_records_requests(self):
+        data = self.populate(2)
+        self.client.force_login(data['student'])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('results'))
+        record = recent_requests[-1]
+        self.assertEqual(record['view'], 'results')
+        self.assertEqual(record['queries'], len(queries))
+        self.assertGreater(record['render_ms'], 0)
+        self.assertAlmostEqual(
+            record['sql_ms'] + record['render_ms'] + record['other_ms'], record['total_ms'], delta=0.01
+        )
+
+
+class QueryPlanTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='planner', password='password123')
+        self.exam = Exam.objects.create(title='Plan Test', duration_minutes=10)
+        Question.objects.create(
+            exam=self.exam, text='1 + 1?', option1='1', option2='2', option3='3', option4='4', correct_answer=2
+        )
+        Attempt.objects.create(user=self.user, exam=self.exam, is_submitted=True, completed_at=timezone.now())
+        Attempt.objects.create(user=self.user, exam=self.exam)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plans are checked in SQLite EXPLAIN QUERY PLAN format')
+    def test_hot_queries_use_indexes(self):
+        # Listing every student is inherently a scan of auth_user.
+        allowed = {'admin_students': ('auth_user',)}
+        for name, queryset in hot_querysets(self.user, self.exam).items():
+            with self.subTest(query=name):
+                self.assertEqual(plan_problems(queryset, allowed.get(name, ())), [])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plans are checked in SQLite EXPLAIN QUERY PLAN format')
+    def test_plan_problems_detects_full_scans(self):
+        self.assertTrue(plan_problems(Attempt.objects.filter(score__gt=1)))
+
+
+class ThumbnailTest(TestCase):
+    def setUp(self):
+        import tempfile
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='pictured', password='password123')
+
+    def photo(self, size=(1200, 900)):
+        from PIL import Image
+
+        image = Image.effect_noise(size, 60).convert('RGB')
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera Maker'
+        exif[0x8825] = {1: 'N', 2: (51.0, 30.0, 0.0)}
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=95, exif=exif)
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_thumbnail_is_small_stripped_and_content_addressed(self):
+        from PIL import Image
+
+        upload = self.photo()
+        profile = StudentProfile.objects.create(user=self.user, profile_pic=upload)
+        name = generate_thumbnail(profile)
+
+        self.assertRegex(name, r'^profile_thumbs/[0-9a-f]{20}\.webp$')
+        profile.refresh_from_db()
+        self.assertEqual(profile.avatar_url, profile.thumbnail.url)
+        with Image.open(profile.thumbnail.path) as thumb:
+            self.assertEqual((thumb.format, thumb.size), ('WEBP', (THUMBNAIL_SIZE, THUMBNAIL_SIZE)))
+            self.assertFalse(thumb.getexif())
+        self.assertLess(profile.thumbnail.size * 20, upload.size)
+
+        # The same picture maps to the same file.
+        other = User.objects.create_user(username='twin', password='password123')
+        twin = StudentProfile.objects.create(user=other, profile_pic=self.photo())
+        self.assertNotEqual(generate_thumbnail(twin), name)
+        twin.profile_pic = profile.profile_pic
+        self.assertEqual(generate_thumbnail(twin), name)
+
+    def test_command_backfills_profiles_without_a_thumbnail_column_value(self):
+        from PIL import Image
+
+        profile = StudentProfile.objects.create(user=self.user, profile_pic=self.photo((200, 200)))
+        # Rows from before the thumbnail column existed hold NULL rather than ''.
+        StudentProfile.objects.filter(pk=profile.pk).update(thumbnail=None)
+        out = StringIO()
+        call_command('generate_thumbnails', workers=1, stdout=out)
+        self.assertIn('Created 1 thumbnails', out.getvalue())
+        profile.refresh_from_db()
+        with Image.open(profile.thumbnail.path) as thumb:
+            self.assertEqual(thumb.format, 'WEBP')
+
+    def test_registration_schedules_thumbnail(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(reverse('register'), {
+                'full_name': 'New Student', 'email': 'new@example.com',
+                'password1': 'a-Strong-pass-123', 'password2': 'a-Strong-pass-123',
+                'profile_pic': self.photo((300, 300)),
+            })
+        profile = StudentProfile.objects.get(user__username='new@example.com')
+        self.assertEqual(len(callbacks), 1)
+        # The stored original is re-encoded without its EXIF and GPS data.
+        from PIL import Image
+
+        with Image.open(profile.profile_pic.path) as original:
+            self.assertEqual((original.format, original.size), ('JPEG', (300, 300)))
+            self.assertFalse(original.getexif())
+
+
+@mock.patch('exam_app.catalog.CATALOG_PAGE_SIZE', 2)
+class HomeCatalogTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='browsing', password='password123')
+        self.client.force_login(self.user)
+        self.exams = [Exam.objects.create(title=f'Catalog {i}', duration_minutes=10) for i in range(3)]
+        Question.objects.create(
+            exam=self.exams[2], text='Q?', option1='a', option2='b', option3='c', option4='d', correct_answer=1
+        )
+
+    def titles(self, response):
+        return [exam['card'].split('</h2>')[0].split('>')[-1] for exam in response.context['exams']]
+
+    def test_pages_newest_first(self):
+        response = self.client.get(reverse('home'))
+        self.assertEqual(self.titles(response), ['Catalog 2', 'Catalog 1'])
+        self.assertContains(response, '1 Questions')
+        response = self.client.get(reverse('home'), {'cursor': response.context['next_cursor']})
+        self.assertEqual(self.titles(response), ['Catalog 0'])
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_cached_cards_with_per_student_status(self):
+        for score in (1, 3):
+            Attempt.objects.create(
+                user=self.user, exam=self.exams[2], is_submitted=True, score=score, completed_at=timezone.now()
+            )
+        other = User.objects.create_user(username='other', password='password123')
+        Attempt.objects.create(user=other, exam=self.exams[1], is_submitted=True, score=5, completed_at=timezone.now())
+
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(reverse('home'))
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(len(warm.captured_queries), len(cold.captured_queries) - 1)
+        statuses = [exam['status'] for exam in response.context['exams']]
+        self.assertEqual(statuses, [{'attempts': 2, 'best_score': 3.0}, None])
+        self.assertContains(response, 'Attempted 2 times')
+
+    def test_catalog_changes_invalidate_cache(self):
+        self.client.get(reverse('home'))
+        Exam.objects.create(title='Catalog new', duration_minutes=10)
+        self.assertEqual(self.titles(self.client.get(reverse('home')))[0], 'Catalog new')
+        Question.objects.filter(exam=self.exams[2]).delete()
+        self.exams[1].delete()
+        response = self.client.get(reverse('home'))
+        self.assertEqual(self.titles(response), ['Catalog new', 'Catalog 2'])
+        self.assertContains(response, '0 Questions')
+
+    def test_only_leading_pages_are_cached(self):
+        self.assertEqual(self.client.get(reverse('home'), {'cursor': 'not-a-cursor'}).status_code, 400)
+        second = catalog_page()[1]
+        with mock.patch('exam_app.catalog.CATALOG_CACHED_PAGES', 2):
+            catalog_page(second)
+            with self.assertNumQueries(0):
+                self.assertEqual(catalog_page(second)[1], None)
+            # A cursor not reached from the first page is served but not cached.
+            stray = encode_cursor(self.exams[2].created_at, self.exams[2].id)
+            catalog_page(stray)
+            with self.assertNumQueries(1):
+                catalog_page(stray)
+        keys = [key for key in cache._cache if ':catalog:' in key]
+        self.assertEqual(len(keys), 4)
+
+
+class SessionStrategyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='session-student', password='password123')
+        self.exam = Exam.objects.create(title='Sessions', duration_minutes=10)
+        Question.objects.create(
+            exam=self.exam, text='1 + 1?', option1='1', option2='2', option3='3', option4='4', correct_answer=2
+        )
+
+    def session_queries(self, strategy):
+        with override_settings(SESSION_ENGINE=settings.EXAM_SESSION_ENGINES[strategy]):
+            samples = simulate_student('session-student', 'password123', self.exam.id, 'testserver', 1)
+        self.assertTrue(all(sample['status'] < 400 for sample in samples))
+        return {sample['endpoint']: sample['session_queries'] for sample in samples}
+
+    def test_session_reads_per_strategy(self):
+        default = self.session_queries('db')
+        self.assertTrue(all(default[endpoint] for endpoint in ('home', 'start_exam', 'submit_exam', 'results')))
+        # After login, cached sessions are read from the cache.
+        cached = self.session_queries('cached_db')
+        self.assertEqual(sum(cached.values()), cached['login'])
+        self.assertEqual(sum(self.session_queries('signed_cookies').values()), 0)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_messages_survive_cookie_sessions(self):
+        import tempfile
+        from PIL import Image
+
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+        picture = BytesIO()
+        Image.new('RGB', (8, 8)).save(picture, 'PNG')
+        response = self.client.post(reverse('register'), {
+            'full_name': 'Cookie Student', 'email': 'cookie@example.com',
+            'password1': 'a-Strong-pass-123', 'password2': 'a-Strong-pass-123',
+            'profile_pic': SimpleUploadedFile('me.png', picture.getvalue(), content_type='image/png'),
+        }, follow=True)
+        self.assertContains(response, 'Registration successful')
+        self.client.login(username='cookie@example.com', password='a-Strong-pass-123')
+        self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+
+
+@override_settings(EXAM_ADMISSION_RATE=2, EXAM_ADMISSION_BURST=2)
+class AdmissionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.exam = Exam.objects.create(title='Crowded', duration_minutes=10)
+        Question.objects.create(
+            exam=self.exam, text='1 + 1?', option1='1', option2='2', option3='3', option4='4', correct_answer=2
+        )
+        self.students = [User.objects.create_user(username=f'crowd-{i}', password='x') for i in range(2)]
+
+    def test_slots_open_at_the_configured_rate(self):
+        now = 1000.0
+        waits = [admission_ticket(user_id, self.exam.id, now=now)[1] for user_id in range(5)]
+        self.assertEqual(waits, [0, 0, 0.5, 1.0, 1.5])
+        # A returning student keeps their place; someone else's ticket does not.
+        token, _ = admission_ticket(7, self.exam.id, now=now)
+        self.assertEqual(admission_ticket(7, self.exam.id, token, now=now + 1), (token, 1.0))
+        self.assertEqual(admission_ticket(8, self.exam.id, token, now=now + 1)[1], 1.5)
+        # So does a plain reload without the ticket, until it is used.
+        self.assertEqual(admission_ticket(7, self.exam.id, now=now + 1), (token, 1.0))
+        self.assertEqual(admission_ticket(7, self.exam.id, now=now + 2), (token, 0))
+        self.assertNotEqual(admission_ticket(7, self.exam.id, now=now + 3)[0], token)
+        # Capacity unused while the exam is quiet is capped at the burst.
+        waits = [admission_ticket(user_id, self.exam.id, now=now + 600)[1] for user_id in range(3)]
+        self.assertEqual(waits, [0, 0, 0.5])
+
+    @override_settings(EXAM_ADMISSION_RATE=0.01, EXAM_ADMISSION_BURST=1)
+    def test_waiting_room_admits_later(self):
+        first, second = self.students
+        self.client.force_login(first)
+        self.assertContains(self.client.get(reverse('start_exam', args=[self.exam.id])), 'examForm')
+
+        self.client.force_login(second)
+        response = self.client.get(reverse('start_exam', args=[self.exam.id]))
+        self.assertTemplateUsed(response, 'waiting_room.html')
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertFalse(Attempt.objects.filter(user=second).exists())
+        ticket = response.context['ticket']
+        with self.assertNumQueries(0):
+            status = self.client.get(reverse('admission_status'), {'ticket': ticket}).json()
+        self.assertFalse(status['admitted'])
+
+        later = time.time() + status['wait'] + 1
+        with mock.patch('exam_app.admission.time.time', return_value=later):
+            self.assertTrue(self.client.get(reverse('admission_status'), {'ticket': ticket}).json()['admitted'])
+            response = self.client.get(reverse('start_exam', args=[self.exam.id]), {'ticket': ticket})
+        self.assertContains(response, 'examForm')
+        # The attempt, and its timer, starts on admission rather than on arrival.
+        self.assertEqual(response.context['attempt'].user, second)
+        self.assertGreaterEqual(response.context['time_remaining'], 599)
+
+
+class ImportStudentsTest(TestCase):
+    def setUp(self):
+        import tempfile
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.enterContext(override_settings(MEDIA_ROOT=os.path.join(self.folder, 'media')))
+        User.objects.create_user(username='taken@example.com', password='password123')
+
+    def test_imports_valid_rows_and_reports_rejects(self):
+        from PIL import Image
+
+        pictures = os.path.join(self.folder, 'pictures')
+        os.mkdir(pictures)
+        Image.new('RGB', (40, 40)).save(os.path.join(pictures, 'ada.png'))
+        with open(os.path.join(pictures, 'notes.png'), 'w') as f:
+            f.write('not an image')
+        path = os.path.join(self.folder, 'students.csv')
+        with open(path, 'w') as f:
+            f.write(
+                'email,full_name,password,profile_pic\n'
+                'Ada@Example.com,Ada Lovelace,Analytical-Engine-1,ada.png\n'
+                'alan@example.com,Alan Turing,Enigma-Breaker-2,\n'
+                'taken@example.com,Someone,Another-Pass-3,\n'
+                'alan@example.com,Alan Again,Enigma-Breaker-2,\n'
+                'weak@example.com,Weak,12345,\n'
+                'not-an-email,Nobody,Some-Pass-4,missing.png\n'
+                'grace@example.com,Grace Hopper,Compiler-Pioneer-5,notes.png\n'
+            )
+        out = StringIO()
+        # Thumbnails are made in threads, which cannot see the test transaction.
+        with mock.patch('exam_app.management.commands.import_students.call_command') as follow_up:
+            call_command('import_students', path, pictures=pictures, workers=1, batch_size=3, stdout=out)
+        self.assertEqual(follow_up.call_args.args, ('generate_thumbnails',))
+
+        ada = User.objects.get(username='ada@example.com')
+        self.assertTrue(ada.check_password('Analytical-Engine-1'))
+        self.assertEqual((ada.email, ada.first_name), ('ada@example.com', 'Ada Lovelace'))
+        self.assertTrue(ada.profile.profile_pic.name.startswith('profile_pics/ada'))
+        self.assertFalse(User.objects.get(username='alan@example.com').profile.profile_pic)
+        self.assertIn('Created 2 students', out.getvalue())
+        self.assertEqual(student_count(), User.objects.filter(is_staff=False).count())
+
+        with open(path + '.rejects.csv') as f:
+            rejects = {row['row']: row['error'] for row in csv.DictReader(f)}
+        self.assertEqual(sorted(rejects), ['4', '5', '6', '7', '8'])
+        self.assertIn('already exists', rejects['4'])
+        self.assertIn('more than once', rejects['5'])
+        self.assertIn('too short', rejects['6'])
+        self.assertIn('not a valid address', rejects['7'])
+        self.assertIn('not a file', rejects['7'])
+        self.assertIn('not a readable image', rejects['8'])
+
+    def test_repeated_insert_races_are_reported_not_raised(self):
+        from PIL import Image
+        from django.db import IntegrityError
+
+        from .management.commands.import_students import Command
+
+        pictures = os.path.join(self.folder, 'pictures')
+        os.mkdir(pictures)
+        Image.new('RGB', (40, 40)).save(os.path.join(pictures, 'ada.png'))
+        path = os.path.join(self.folder, 'students.csv')
+        with open(path, 'w') as f:
+            f.write(
+                'email,full_name,password,profile_pic\n'
+                'ada@example.com,Ada Lovelace,Analytical-Engine-1,ada.png\n'
+                'bob@example.com,Bob,Another-Pass-3,\n'
+                'cy@example.com,Cy,Third-Pass-4,\n'
+            )
+
+        def racing_create(command, users, pictures):
+            # Each try, someone else registers the first email in the batch.
+            User.objects.create_user(username=users[0].username)
+            raise IntegrityError('UNIQUE constraint failed: auth_user.username')
+
+        out = StringIO()
+        with mock.patch.object(Command, '_create', racing_create):
+            call_command('import_students', path, pictures=pictures, workers=1, stdout=out)
+        self.assertIn('Created 0 students', out.getvalue())
+        with open(path + '.rejects.csv') as f:
+            rejects = {row['email']: row['error'] for row in csv.DictReader(f)}
+        self.assertEqual(set(rejects), {'ada@example.com', 'bob@example.com', 'cy@example.com'})
+        self.assertFalse(os.listdir(os.path.join(self.folder, 'media', 'profile_pics')))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The search index uses SQLite FTS5.')
+class QuestionSearchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.geography = Exam.objects.create(title='Geography', duration_minutes=10)
+        self.science = Exam.objects.create(title='Science', duration_minutes=10)
+        self.capital = self.add(self.geography, 'What is the capital of France?', 'Paris', 'Rome')
+        self.add(self.geography, 'Which river flows through Paris?', 'Seine', 'Thames')
+        self.add(self.science, 'Which planet is called the red planet?', 'Mars', 'Venus')
+
+    def add(self, exam, text, *options):
+        options = [*options, 'Other', 'None'][:4]
+        return Question.objects.create(
+            exam=exam, text=text, option1=options[0], option2=options[1], option3=options[2],
+            option4=options[3], correct_answer=1
+        )
+
+    def texts(self, terms, exam_id=None):
+        return [question.text for question, _ in search_questions(terms, exam_id)]
+
+    def test_ranked_search_stays_in_sync(self):
+        # A match in the question text outranks one in the options.
+        self.assertEqual(self.texts('paris'), ['Which river flows through Paris?', 'What is the capital of France?'])
+        self.assertEqual(self.texts('planets'), ['Which planet is called the red planet?'])
+        self.assertEqual(self.texts('pari'), self.texts('paris'))
+        self.assertEqual(self.texts('paris', self.science.id), [])
+        self.assertEqual(self.texts('"OR" ('), [])
+        _, snippet = search_questions('france')[0]
+        self.assertIn('<mark>France</mark>', snippet)
+
+        self.capital.text = 'What is the capital of Spain?'
+        self.capital.option1 = 'Madrid'
+        self.capital.save()
+        self.assertEqual(self.texts('spain'), ['What is the capital of Spain?'])
+        self.assertEqual(self.texts('france'), [])
+        self.capital.delete()
+        self.assertEqual(self.texts('spain'), [])
+
+        upload = SimpleUploadedFile(
+            'questions.csv',
+            b'text,option1,option2,option3,option4,correct_answer\nHow deep is the Mariana trench?,11km,5km,2km,1km,1\n',
+        )
+        import_questions(self.science, upload)
+        self.assertEqual(self.texts('mariana'), ['How deep is the Mariana trench?'])
+
+    def test_admin_search(self):
+        staff = User.objects.create_user(username='searcher', password='password123', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('admin_question_search'), {'q': 'red planet'})
+        self.assertContains(response, '<mark>red</mark>')
+        self.assertEqual(len(response.context['results']), 1)
+        staff.is_superuser = True
+        staff.save()
+        response = self.client.get('/admin/exam_app/question/', {'q': 'paris'})
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+
+class DuplicateQuestionTest(TestCase):
+    def test_groups_near_duplicates_only(self):
+        texts = [
+            'What is the capital of France? Paris Rome Berlin Madrid',
+            'What is the capitol of France? Paris Rome Berlin Madrid',
+            'Which planet is known as the Red Planet? Venus Mars Jupiter Saturn',
+            'What is the boiling point of water? 90C 100C 110C 120C',
+            'What is the capital of France?? Paris, Rome, Berlin, Madrid',
+        ]
+        signatures = MinHasher().signatures([shingles(text) for text in texts])
+        self.assertEqual(near_duplicate_groups([10, 11, 12, 13, 14], signatures, 0.7), [[10, 11, 14]])
+
+    def test_duplicates_unlike_the_bucket_head_are_grouped(self):
+        # All three share only the first band; the last two agree on 25 of 32
+        # hashes but the first differs from both.
+        signatures = np.zeros((3, 32), dtype=np.uint32)
+        signatures[1:, 4:] = 1
+        signatures[2, 4::4] = 2
+        self.assertEqual(near_duplicate_groups([10, 11, 12], signatures, 0.7), [[11, 12]])
+
+    def test_command_reports_groups(self):
+        exam = Exam.objects.create(title='Dupes', duration_minutes=10)
+        for text in ('How many legs does a spider have?', 'How many legs does a spider have ?', 'Name a prime.'):
+            Question.objects.create(exam=exam, text=text, option1='6', option2='8', option3='10', option4='4',
+                                    correct_answer=2)
+        out = StringIO()
+        call_command('find_duplicate_questions', stdout=out)
+        self.assertIn('Group 1 (2 questions)', out.getvalue())
+        self.assertIn('found 1 groups', out.getvalue())
+
+
+class QuestionSamplingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='sampled', password='password123')
+        self.exam = Exam.objects.create(title='Pool', duration_minutes=10, total_questions=6, stratify_by_marks=True)
+        Question.objects.bulk_create([
+            Question(exam=self.exam, text=f'Q{i}?', option1='a', option2='b', option3='c', option4='d',
+                     correct_answer=1, marks=1 if i < 20 else 2)
+            for i in range(30)
+        ])
+        self.client.force_login(self.user)
+
+    def test_catalog_shows_questions_per_attempt(self):
+        rebuild_stats()
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, '6 Questions')
+        self.assertNotContains(response, '30 Questions')
+
+    def test_allocate_is_proportional(self):
+        self.assertEqual(allocate(6, [20, 10]).tolist(), [4, 2])
+        self.assertEqual(allocate(3, [5, 5, 1]).tolist(), [2, 1, 0])
+        self.assertEqual(allocate(4, [1, 1, 1, 1]).tolist(), [1, 1, 1, 1])
+
+    def test_sampling_is_seeded_and_stratified(self):
+        drawn = sample_questions(self.exam, 7)
+        self.assertEqual(drawn.tolist(), sample_questions(self.exam, 7).tolist())
+        marks = dict(Question.objects.filter(id__in=drawn.tolist()).values_list('id', 'marks'))
+        self.assertEqual(sorted(marks.values()), [1, 1, 1, 1, 2, 2])
+        self.assertEqual(len({tuple(sample_questions(self.exam, seed)) for seed in range(20)}), 20)
+        with self.assertNumQueries(0):
+            sample_questions(self.exam, 8)
+
+        self.exam.total_questions = 0
+        self.assertIsNone(sample_questions(self.exam, 7))
+        self.exam.total_questions = 50
+        self.assertIsNone(sample_questions(self.exam, 7))
+
+    def test_attempt_uses_only_drawn_questions(self):
+        response = self.client.get(reverse('exam_instructions', args=[self.exam.id]))
+        self.assertEqual(response.context['question_count'], 6)
+
+        html = self.client.get(reverse('start_exam', args=[self.exam.id])).content.decode()
+        attempt = Attempt.objects.get(user=self.user)
+        drawn = unpack_question_ids(attempt.question_set)
+        self.assertEqual(sorted(question_order(html)), drawn)
+        paper = self.client.get(reverse('exam_paper', args=[attempt.id])).json()
+        self.assertEqual([row[0] for row in paper['questions']], drawn)
+        # Resuming shows the same questions.
+        html = self.client.get(reverse('start_exam', args=[self.exam.id])).content.decode()
+        self.assertEqual(sorted(question_order(html)), drawn)
+
+        other = Question.objects.filter(exam=self.exam).exclude(id__in=drawn).first()
+        answers = {f'question_{question_id}': '1' for question_id in drawn}
+        answers[f'question_{other.id}'] = '1'
+        response = self.client.post(reverse('submit_exam', args=[attempt.id]), answers)
+        self.assertEqual(response.context['total_questions'], 6)
+        self.assertEqual(response.context['total_marks'], 8)
+        self.assertEqual(response.context['score'], 8)
+
+    def test_analysis_counts_only_shown_items(self):
+        questions = list(Question.objects.filter(exam=self.exam).order_by('id')[:3])
+        for question_ids, choice in [(questions[:2], 1), (questions[1:], 2)]:
+            attempt = Attempt.objects.create(
+                user=self.user, exam=self.exam, is_submitted=True, completed_at=timezone.now(),
+                question_set=pack_question_ids(sorted(question.id for question in question_ids)),
+            )
+            Response.objects.bulk_create([
+                Response(attempt=attempt, question=question, selected_option=choice) for question in question_ids
+            ])
+        items = item_analysis(self.exam.id)['items'][:4]
+        self.assertEqual([item['shown'] for item in items], [1, 2, 1, 0])
+        self.assertEqual([item['difficulty'] for item in items], [1.0, 0.5, 0.0, None])
+        self.assertEqual([item['unanswered'] for item in items], [0, 0, 0, 0])
+        self.assertIsNone(item_analysis(self.exam.id)['alpha'])
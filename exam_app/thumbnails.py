@@ -0,0 +1,106 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+from .models import StudentProfile
+
+logger = logging.getLogger(__name__)
+
+# Rendered at 48px or less, so this covers 2x displays.
+THUMBNAIL_SIZE = 96
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_DIR = 'profile_thumbs'
+# Upload formats kept when stripping metadata, with the file extension to use.
+KEPT_FORMATS = {'JPEG': ('JPEG', 'jpg'), 'MPO': ('JPEG', 'jpg'), 'PNG': ('PNG', 'png'),
+                'WEBP': ('WEBP', 'webp'), 'GIF': ('GIF', 'gif')}
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'EXAM_THUMBNAIL_WORKERS', 2), thread_name_prefix='thumbnails'
+)
+
+
+def render_thumbnail(file):
+    """Return a square WebP thumbnail of an image file, without any metadata."""
+    from PIL import Image, ImageOps
+
+    with Image.open(file) as image:
+        # Apply the EXIF orientation before the metadata is dropped.
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        image = ImageOps.fit(image, (THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+        output = BytesIO()
+        # A freshly encoded image carries no EXIF, ICC or XMP data.
+        image.save(output, 'WEBP', quality=THUMBNAIL_QUALITY, method=6)
+    return output.getvalue()
+
+
+def strip_metadata(file, name):
+    """Re-encode an uploaded picture without its EXIF, GPS or XMP metadata.
+
+    Returns a ContentFile to store in place of the original upload.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(file) as image:
+        icc_profile = image.info.get('icc_profile')
+        if image.format in KEPT_FORMATS:
+            image_format, extension = KEPT_FORMATS[image.format]
+        else:
+            image_format, extension = 'PNG', 'png'
+        image = ImageOps.exif_transpose(image)
+        # Encoders also copy EXIF and XMP from ``info``; keep only transparency.
+        image.info = {key: value for key, value in image.info.items() if key == 'transparency'}
+        if image_format == 'JPEG':
+            image = image.convert('RGB')
+        elif extension == 'png' and image.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        output = BytesIO()
+        # Only the colour profile is carried over.
+        image.save(output, image_format, quality=90, icc_profile=icc_profile)
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return ContentFile(output.getvalue(), name=f'{stem}.{extension}')
+
+
+def thumbnail_name(content):
+    """Name derived from the content, so the URL can be cached forever."""
+    return f'{THUMBNAIL_DIR}/{hashlib.sha256(content).hexdigest()[:20]}.webp'
+
+
+def generate_thumbnail(profile):
+    """Render and store the thumbnail for ``profile``; return its name."""
+    profile.profile_pic.open('rb')
+    try:
+        content = render_thumbnail(profile.profile_pic)
+    finally:
+        profile.profile_pic.close()
+    name = thumbnail_name(content)
+    storage = profile.thumbnail.storage
+    # Identical pictures share one file.
+    if not storage.exists(name):
+        name = storage.save(name, ContentFile(content))
+    StudentProfile.objects.filter(pk=profile.pk).update(thumbnail=name)
+    profile.thumbnail.name = name
+    return name
+
+
+def _process(profile_id):
+    close_old_connections()
+    try:
+        profile = StudentProfile.objects.filter(pk=profile_id).exclude(profile_pic='').first()
+        if profile is not None and profile.profile_pic:
+            generate_thumbnail(profile)
+    except Exception:
+        logger.exception("Could not create a thumbnail for profile %s", profile_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_thumbnail(profile_id):
+    """Create the profile's thumbnail in the background once the transaction commits."""
+    transaction.on_commit(lambda: _executor.submit(_process, profile_id))
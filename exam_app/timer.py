@@ -0,0 +1,27 @@
+import time
+
+from django.core import signing
+
+TIMER_SALT = 'exam-timer'
+
+
+def make_timer_token(attempt):
+    """Sign the attempt's id, start time and duration for the timer-sync endpoint."""
+    return signing.dumps(
+        [attempt.id, int(attempt.started_at.timestamp()), attempt.exam.duration_minutes * 60],
+        salt=TIMER_SALT,
+    )
+
+
+def read_timer_token(token):
+    """Return ``(attempt_id, started_at, duration)`` or raise ``signing.BadSignature``."""
+    try:
+        attempt_id, started_at, duration = signing.loads(token, salt=TIMER_SALT)
+    except (TypeError, ValueError):
+        raise signing.BadSignature('Malformed timer token.')
+    return attempt_id, started_at, duration
+
+
+def seconds_remaining(started_at, duration, now=None):
+    now = time.time() if now is None else now
+    return max(0, int(started_at + duration - now))
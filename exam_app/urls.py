@@ -11,6 +11,10 @@ urlpatterns = [
     path('exam/<int:exam_id>/instructions/', views.exam_instructions, name='exam_instructions'),
     path('exam/<int:exam_id>/start/', views.start_exam, name='start_exam'),
     path('attempt/<int:attempt_id>/submit/', views.submit_exam, name='submit_exam'),
+    path('attempt/<int:attempt_id>/paper/', views.exam_paper, name='exam_paper'),
+    path('attempt/<int:attempt_id>/autosave/', views.autosave_answers, name='autosave_answers'),
+    path('timer/', views.timer_sync, name='timer_sync'),
+    path('admission/', views.admission_status, name='admission_status'),
     path('results/', views.results, name='results'),
     
     # Custom Admin Dashboard URLs
@@ -20,10 +24,14 @@ urlpatterns = [
     path('admin/exams/<int:exam_id>/edit/', views.admin_exam_edit, name='admin_exam_edit'),
     path('admin/exams/<int:exam_id>/delete/', views.admin_exam_delete, name='admin_exam_delete'),
     path('admin/exams/<int:exam_id>/questions/', views.admin_exam_questions, name='admin_exam_questions'),
+    path('admin/exams/<int:exam_id>/analysis/', views.admin_exam_analysis, name='admin_exam_analysis'),
+    path('admin/exams/<int:exam_id>/questions/export/', views.admin_exam_questions_export, name='admin_exam_questions_export'),
+    path('admin/questions/search/', views.admin_question_search, name='admin_question_search'),
     path('admin/questions/<int:question_id>/delete/', views.admin_question_delete, name='admin_question_delete'),
     path('admin/students/', views.admin_students, name='admin_students'),
 
     path('admin/results/', views.admin_results, name='admin_results'),
+    path('admin/results/export/', views.admin_results_export, name='admin_results_export'),
     path('admin/upload/', views.upload_questions, name='upload_questions'), # Reusing existing
 ]
 
@@ -1,20 +1,46 @@
-import random
+import math
+import time
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login
 from django.utils import timezone
-from .models import Exam, Question, Attempt, StudentProfile
+from .models import SUBMIT_GRACE_SECONDS, Exam, ExamStats, Question, Attempt, GradingJob, StudentProfile, generate_seed
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
-import pandas as pd
-from django.db.models import Avg, Count
-from .forms import StudentRegistrationForm, QuestionUploadForm, ExamForm, QuestionForm
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, NullIf
+from .admission import admission_enabled, admission_ticket, read_ticket, seconds_to_wait
+from .decorators import aget_object_or_404, async_login_required
+from .forms import StudentRegistrationForm, QuestionUploadForm, ExamForm, QuestionForm, QuestionSearchForm, ResultsFilterForm
+from .pagination import akeyset_page, keyset_page
+from .caching import get_exam_version
+from .papers import paper_etag, paper_json
+from .catalog import attempt_status, catalog_page
+from .analytics import item_analysis
+from .importers import import_questions
+from .sampling import draw_question_set, questions_per_attempt
+from .search import search_questions
+from .exports import ATTEMPT_COLUMNS, QUESTION_COLUMNS, attempt_rows, export_response, question_rows
+from .scoring import answers_from_post, get_answer_key
+from .grading import enqueue_submission, finalize_submission, pending_attempts, resumable_attempt
+from .stats import student_count
+from .thumbnails import schedule_thumbnail, strip_metadata
+from .timer import make_timer_token, read_timer_token, seconds_remaining
+from .writer import write_queue
+from .autosave import parse_autosave, response_buffer
 from django.contrib.auth.models import User
+from django.core.signing import BadSignature
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.utils.cache import add_never_cache_headers, get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_POST
 # start my first project
 def landing(request):
     return render(request, 'landing.html')
 
-from django.db import transaction
+from django.conf import settings
+from django.db import IntegrityError, transaction
 
 def register(request):
     if request.method == 'POST':
@@ -23,8 +49,10 @@ def register(request):
             try:
                 with transaction.atomic():
                     user = form.save()
-                    profile_pic = form.cleaned_data.get('profile_pic')
-                    StudentProfile.objects.create(user=user, profile_pic=profile_pic)
+                    upload = form.cleaned_data['profile_pic']
+                    profile_pic = strip_metadata(upload, upload.name)
+                    profile = StudentProfile.objects.create(user=user, profile_pic=profile_pic)
+                    schedule_thumbnail(profile.id)
                 messages.success(request, "Registration successful! Please login to continue.")
                 return redirect('login')
             except Exception as e:
@@ -35,39 +63,78 @@ def register(request):
 
 @login_required
 def home(request):
-    exams = Exam.objects.all().order_by('-created_at')
-    return render(request, 'home.html', {'exams': exams})
+    try:
+        cards, next_cursor = catalog_page(request.GET.get('cursor'))
+    except ValueError:
+        return HttpResponseBadRequest('Invalid page cursor.')
+    # The cached cards are the same for everyone; only the status is per student.
+    statuses = attempt_status(request.user, [exam_id for exam_id, _ in cards])
+    exams = [
+        {'id': exam_id, 'card': card, 'status': statuses.get(exam_id)}
+        for exam_id, card in cards
+    ]
+    return render(request, 'home.html', {
+        'exams': exams,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+    })
 
 @login_required
 def exam_instructions(request, exam_id):
     exam = get_object_or_404(Exam, id=exam_id)
-    return render(request, 'exam_instructions.html', {'exam': exam})
+    return render(request, 'exam_instructions.html', {
+        'exam': exam,
+        'question_count': questions_per_attempt(exam, exam.questions.count()),
+    })
 
-@login_required
-def start_exam(request, exam_id):
-    exam = get_object_or_404(Exam, id=exam_id)
+@async_login_required
+async def start_exam(request, exam_id):
+    exam = await aget_object_or_404(Exam.objects.all(), id=exam_id)
     
-    # Check if user has an active attempt or create a new one
-    attempt = Attempt.objects.create(user=request.user, exam=exam)
+    # Resume the student's unfinished attempt if its time has not run out
+    attempt = await sync_to_async(resumable_attempt)(request.user, exam)
+    saved_answers = {}
+    if attempt is None and admission_enabled():
+        ticket, wait = await sync_to_async(admission_ticket)(request.user.id, exam.id, request.GET.get('ticket'))
+        if wait > 0:
+            # The attempt, and so its timer, is only created once admitted.
+            return await sync_to_async(waiting_room)(request, exam, ticket, wait)
+    if attempt is None:
+        seed = generate_seed()
+        attempt = await write_queue.asubmit(
+            Attempt.objects.create, user=request.user, exam=exam, seed=seed,
+            question_set=await sync_to_async(draw_question_set)(exam, seed),
+        )
+    else:
+        await sync_to_async(response_buffer.flush)(attempt.id)
+        saved_answers = {
+            f'question_{question_id}': option
+            async for question_id, option in attempt.responses.exclude(
+                selected_option=None
+            ).values_list('question_id', 'selected_option')
+        }
     
-    # Randomize questions for this attempt
-    questions = list(exam.questions.all())
-    random.shuffle(questions)
+    # The attempt's seed gives the same question order on every resume
+    question_ids = attempt.question_order(await sync_to_async(get_answer_key)(exam.id, attempt.question_set))
     
     context = {
         'exam': exam,
-        'questions': questions,
+        'question_ids': question_ids,
         'attempt': attempt,
-        'time_remaining': exam.duration_minutes * 60
+        'saved_answers': saved_answers,
+        'time_remaining': attempt.time_remaining,
+        'timer_token': make_timer_token(attempt),
     }
-    return render(request, 'start_exam.html', context)
+    return await sync_to_async(render)(request, 'start_exam.html', context)
 
-@login_required
-def submit_exam(request, attempt_id):
+@async_login_required
+async def submit_exam(request, attempt_id):
     if request.method != 'POST':
         return redirect('home')
         
-    attempt = get_object_or_404(Attempt, id=attempt_id, user=request.user)
+    attempt = await aget_object_or_404(
+        Attempt.objects.select_related('exam'), id=attempt_id, user=request.user
+    )
     
     if attempt.is_submitted:
         messages.warning(request, "This attempt has already been submitted.")
@@ -75,28 +142,32 @@ def submit_exam(request, attempt_id):
         
     # Server-side time validation
     elapsed_time = (timezone.now() - attempt.started_at).total_seconds()
-    if elapsed_time > (attempt.exam.duration_minutes * 60) + 10: # 10s grace period
+    if elapsed_time > (attempt.exam.duration_minutes * 60) + SUBMIT_GRACE_SECONDS:
         messages.error(request, "Time limit exceeded. Submission late.")
     
-    score = 0
-    correct_count = 0
-    total_marks = 0
-    questions = attempt.exam.questions.all()
-    total_questions = questions.count()
-    
-    for question in questions:
-        total_marks += question.marks
-        answer_key = f'question_{question.id}'
-        selected_option = request.POST.get(answer_key)
-        
-        if selected_option and int(selected_option) == question.correct_answer:
-            score += question.marks
-            correct_count += 1
-            
-    attempt.score = score
-    attempt.completed_at = timezone.now()
-    attempt.is_submitted = True
-    attempt.save()
+    answer_key = await sync_to_async(get_answer_key)(attempt.exam_id, attempt.question_set)
+    answers = {
+        question_id: option
+        for question_id, option in answers_from_post(request.POST).items()
+        if question_id in answer_key
+    }
+    await sync_to_async(response_buffer.flush)(attempt.id)
+    if settings.EXAM_ASYNC_GRADING:
+        # Persist the raw answers and let a grade_submissions worker score them.
+        try:
+            await write_queue.asubmit(enqueue_submission, attempt, answers)
+        except IntegrityError:
+            messages.warning(request, "This attempt has already been submitted.")
+            return redirect('results')
+        messages.success(request, "Your answers have been submitted. Your score will appear here shortly.")
+        return redirect('results')
+
+    result = await write_queue.asubmit(finalize_submission, attempt, answers)
+    if result is None:
+        messages.warning(request, "This attempt has already been submitted.")
+        return redirect('results')
+    score = result['score']
+    total_marks = result['total_marks']
     
     percentage = (score / total_marks * 100) if total_marks > 0 else 0
     
@@ -104,32 +175,128 @@ def submit_exam(request, attempt_id):
         'attempt': attempt,
         'score': score,
         'total_marks': total_marks,
-        'correct_count': correct_count,
-        'total_questions': total_questions,
+        'correct_count': result['correct_count'],
+        'total_questions': result['total_questions'],
         'percentage': percentage,
     }
-    return render(request, 'result_detail.html', context)
+    return await sync_to_async(render)(request, 'result_detail.html', context)
+
+def waiting_room(request, exam, ticket, wait):
+    response = render(request, 'waiting_room.html', {
+        'exam': exam,
+        'ticket': ticket,
+        'wait': round(wait, 1),
+        'ahead': int(wait * settings.EXAM_ADMISSION_RATE),
+    })
+    response['Retry-After'] = str(math.ceil(wait))
+    add_never_cache_headers(response)
+    return response
+
+async def admission_status(request):
+    # Like timer_sync, answered from the signed ticket alone.
+    try:
+        _, _, due = read_ticket(request.GET.get('ticket', ''))
+    except BadSignature:
+        return JsonResponse({'error': 'Invalid admission ticket.'}, status=400)
+    wait = seconds_to_wait(due)
+    response = JsonResponse({'admitted': wait == 0, 'wait': round(wait, 1)})
+    add_never_cache_headers(response)
+    return response
+
+async def timer_sync(request):
+    # Answered from the signed token alone: no session, user or attempt lookup.
+    try:
+        attempt_id, started_at, duration = read_timer_token(request.GET.get('token', ''))
+    except BadSignature:
+        return JsonResponse({'error': 'Invalid timer token.'}, status=400)
+    now = time.time()
+    response = JsonResponse({
+        'attempt': attempt_id,
+        'time_remaining': seconds_remaining(started_at, duration, now),
+        'server_time': now,
+    })
+    add_never_cache_headers(response)
+    return response
+
+@login_required
+def exam_paper(request, attempt_id):
+    """The questions of an attempt as compact JSON, revalidated with a strong ETag.
+
+    The ETag only changes with the exam version, so a reconnecting student
+    gets a 304 instead of the paper.
+    """
+    row = Attempt.objects.filter(id=attempt_id, user=request.user).values_list('exam_id', 'question_set').first()
+    if row is None:
+        return JsonResponse({'error': 'Attempt not found.'}, status=404)
+    exam_id, question_set = row
+    version = get_exam_version(exam_id)
+    etag = paper_etag(exam_id, version, question_set)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            paper_json(exam_id, get_answer_key(exam_id, question_set), version), content_type='application/json'
+        )
+    response.headers['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 @login_required
-def results(request):
-    attempts = Attempt.objects.filter(user=request.user, is_submitted=True).order_by('-completed_at')
-    return render(request, 'results.html', {'attempts': attempts})
+@require_POST
+def autosave_answers(request, attempt_id):
+    row = Attempt.objects.filter(
+        id=attempt_id, user=request.user, is_submitted=False, grading_job=None
+    ).values_list('exam_id', 'question_set').first()
+    if row is None:
+        return JsonResponse({'error': 'Attempt not found or already submitted.'}, status=404)
+
+    answer_key = get_answer_key(*row)
+    answers = {
+        question_id: option
+        for question_id, option in parse_autosave(request.POST).items()
+        if question_id in answer_key
+    }
+    response_buffer.add(attempt_id, answers)
+    return JsonResponse({'saved': len(answers)})
+
+@async_login_required
+async def results(request):
+    attempts, next_cursor = await akeyset_page(
+        Attempt.objects.filter(user=request.user, is_submitted=True)
+        .select_related('exam')
+        .only('id', 'score', 'completed_at', 'exam__title', 'exam__total_questions'),
+        request.GET.get('cursor'),
+    )
+    pending = [attempt async for attempt in pending_attempts(request.user)]
+    return await sync_to_async(render)(request, 'results.html', {
+        'attempts': attempts,
+        'pending_attempts': pending,
+        'grading_in_progress': any(attempt.grading_job.status != GradingJob.FAILED for attempt in pending),
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+    })
 
 
 @staff_member_required
 def admin_dashboard(request):
-    total_exams = Exam.objects.count()
-    total_students = User.objects.filter(is_staff=False).count()
-    total_attempts = Attempt.objects.count()
-    total_questions = Question.objects.count()
+    totals = ExamStats.objects.aggregate(
+        exams=Count('pk'),
+        attempts=Coalesce(Sum('attempt_count'), 0),
+        questions=Coalesce(Sum('question_count'), 0),
+    )
+    total_students = student_count()
     
-    recent_attempts = Attempt.objects.filter(is_submitted=True).order_by('-completed_at')[:5]
+    recent_attempts, _ = keyset_page(
+        Attempt.objects.filter(is_submitted=True)
+        .select_related('user', 'exam')
+        .only('id', 'score', 'completed_at', 'user__username', 'exam__title'),
+        page_size=5,
+    )
     
     context = {
-        'total_exams': total_exams,
+        'total_exams': totals['exams'],
         'total_students': total_students,
-        'total_attempts': total_attempts,
-        'total_questions': total_questions,
+        'total_attempts': totals['attempts'],
+        'total_questions': totals['questions'],
         'recent_attempts': recent_attempts,
     }
     return render(request, 'admin_dashboard.html', context)
@@ -186,6 +353,24 @@ def admin_exam_questions(request, exam_id):
         'form': form
     })
 
+@staff_member_required
+def admin_exam_analysis(request, exam_id):
+    exam = get_object_or_404(Exam, id=exam_id)
+    analysis = item_analysis(exam.id)
+    texts = dict(exam.questions.values_list('id', 'text'))
+    for item in analysis['items']:
+        item['text'] = texts.get(item['question_id'], '')
+    return render(request, 'admin_exam_analysis.html', {'exam': exam, 'analysis': analysis})
+
+@staff_member_required
+def admin_question_search(request):
+    form = QuestionSearchForm(request.GET or None)
+    results = []
+    if form.is_valid() and form.cleaned_data['q']:
+        exam = form.cleaned_data['exam']
+        results = search_questions(form.cleaned_data['q'], exam.id if exam else None)
+    return render(request, 'admin_question_search.html', {'form': form, 'results': results})
+
 @staff_member_required
 def admin_exam_delete(request, exam_id):
     exam = get_object_or_404(Exam, id=exam_id)
@@ -204,19 +389,57 @@ def admin_question_delete(request, question_id):
 @staff_member_required
 def admin_students(request):
 
-    students = User.objects.filter(is_staff=False).annotate(
-        attempt_count=Count('attempt'),
-        avg_score=Avg('attempt__score')
+    # Reads the maintained StudentStats row instead of aggregating attempts.
+    students = User.objects.filter(is_staff=False).select_related('profile').annotate(
+        attempt_count=Coalesce('exam_stats__attempt_count', 0),
+        avg_score=F('exam_stats__score_sum') / NullIf('exam_stats__attempt_count', 0),
     )
     return render(request, 'admin_students.html', {'students': students})
 
 @staff_member_required
 def admin_results(request):
-    attempts = Attempt.objects.filter(is_submitted=True).order_by('-completed_at')
-    return render(request, 'admin_results.html', {'attempts': attempts})
+    filter_form = ResultsFilterForm(request.GET or None)
+    attempts = filter_form.filter(
+        Attempt.objects.filter(is_submitted=True)
+        .select_related('user', 'exam')
+        .only('id', 'score', 'completed_at', 'user__username', 'exam__title')
+    )
+    attempts, next_cursor = keyset_page(attempts, request.GET.get('cursor'))
+
+    next_query = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_query = query.urlencode()
+    first_query = request.GET.copy()
+    first_query.pop('cursor', None)
+    return render(request, 'admin_results.html', {
+        'attempts': attempts,
+        'filter_form': filter_form,
+        'next_query': next_query,
+        'first_query': first_query.urlencode(),
+        'is_first_page': 'cursor' not in request.GET,
+    })
+
+@staff_member_required
+def admin_results_export(request):
+    filter_form = ResultsFilterForm(request.GET or None)
+    attempts = filter_form.filter(Attempt.objects.filter(is_submitted=True))
+    return export_response(
+        request.GET.get('format'), ATTEMPT_COLUMNS, attempt_rows(attempts),
+        f"results-{timezone.localdate():%Y%m%d}"
+    )
+
+@staff_member_required
+def admin_exam_questions_export(request, exam_id):
+    exam = get_object_or_404(Exam, id=exam_id)
+    return export_response(
+        request.GET.get('format'), QUESTION_COLUMNS, question_rows(exam), f'exam-{exam.id}-questions'
+    )
 
 @staff_member_required
 def upload_questions(request):
+    report = None
     if request.method == 'POST':
         form = QuestionUploadForm(request.POST, request.FILES)
         if form.is_valid():
@@ -224,33 +447,19 @@ def upload_questions(request):
             file = request.FILES['file']
             
             try:
-                # Support CSV and Excel
-                if file.name.endswith('.csv'):
-                    df = pd.read_csv(file)
-                else:
-                    df = pd.read_excel(file)
-                
-                # Expected columns: text, option1, option2, option3, option4, correct_answer, marks
-                created_count = 0
-                for _, row in df.iterrows():
-                    Question.objects.create(
-                        exam=exam,
-                        text=row['text'],
-                        option1=row['option1'],
-                        option2=row['option2'],
-                        option3=row['option3'],
-                        option4=row['option4'],
-                        correct_answer=int(row['correct_answer']),
-                        marks=int(row.get('marks', 1))
-                    )
-                    created_count += 1
-                
-                messages.success(request, f"Successfully uploaded {created_count} questions!")
-                return redirect('admin_dashboard') # Redirect to admin dashboard
+                report = import_questions(exam, file)
             except Exception as e:
-                messages.error(request, f"Error processing file: {str(e)}")
+                messages.error(request, f"Error processing file: {str(e)}. No questions were imported.")
+            else:
+                messages.success(
+                    request,
+                    f"Successfully uploaded {report.created} questions "
+                    f"({report.rows_per_second:.0f} rows/sec)."
+                )
+                if not report.errors:
+                    return redirect('admin_dashboard') # Redirect to admin dashboard
+                messages.warning(request, f"{len(report.errors)} rows were skipped. See the report below.")
     else:
         form = QuestionUploadForm()
     
-    return render(request, 'upload_questions.html', {'form': form})
-
+    return render(request, 'upload_questions.html', {'form': form, 'report': report})
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class WriteQueue:
+    """Funnels hot-path writes through one thread that commits them in batches.
+
+    SQLite allows a single writer at a time. Instead of many request threads
+    competing for the write lock (and failing with "database is locked"),
+    writes are queued and applied by a dedicated thread. Each write runs in
+    its own savepoint inside a shared transaction, so a batch of concurrent
+    writes costs one commit and one failing write does not affect the others.
+    Callers block until their batch has committed.
+    """
+
+    def __init__(self, max_batch=64, max_wait=0.002):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'EXAM_WRITE_QUEUE', False)
+
+    def submit(self, func, *args, **kwargs):
+        """Run ``func(*args, **kwargs)`` on the writer thread and return its result."""
+        if not self.enabled:
+            return func(*args, **kwargs)
+        return self._enqueue(func, args, kwargs).result()
+
+    async def asubmit(self, func, *args, **kwargs):
+        """Async :meth:`submit` that waits for the batch without holding a thread.
+
+        Awaiting ``submit`` through ``sync_to_async`` would park every caller
+        on the single sync thread, so the writer would only ever see one
+        write at a time.
+        """
+        if not self.enabled:
+            return await sync_to_async(func)(*args, **kwargs)
+        return await asyncio.wrap_future(self._enqueue(func, args, kwargs))
+
+    def _enqueue(self, func, args, kwargs):
+        future = Future()
+        self._ensure_started()
+        self._queue.put((func, args, kwargs, future))
+        return future
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='exam-write-queue', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get(timeout=self.max_wait))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            outcomes = []
+            try:
+                with transaction.atomic():
+                    for func, args, kwargs, future in batch:
+                        try:
+                            with transaction.atomic():
+                                outcomes.append((future, func(*args, **kwargs), None))
+                        except Exception as e:
+                            outcomes.append((future, None, e))
+            except Exception as e:
+                logger.exception("Write queue batch failed to commit")
+                connection.close()
+                for _, _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            # Only report results once the batch is durable.
+            for future, result, error in outcomes:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+
+write_queue = WriteQueue()
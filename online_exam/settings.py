@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-your-secret-key-here'
@@ -20,6 +22,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'exam_app.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -33,7 +36,9 @@ ROOT_URLCONF = 'online_exam.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that also records render time in the request metrics.
+        'BACKEND': 'exam_app.templating.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -56,6 +61,57 @@ DATABASES = {
     }
 }
 
+# High-concurrency SQLite mode (EXAM_SQLITE_PRODUCTION=1): WAL journal and
+# tuned PRAGMAs (see exam_app/db.py), persistent connections, and a single
+# writer thread that batches Attempt creation and finalization.
+SQLITE_PRODUCTION_MODE = os.environ.get('EXAM_SQLITE_PRODUCTION', '').lower() in ('1', 'true', 'yes')
+if SQLITE_PRODUCTION_MODE:
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+EXAM_WRITE_QUEUE = SQLITE_PRODUCTION_MODE
+
+# Compiled answer keys and other per-exam data are cached here and invalidated
+# by version bumps. Set EXAM_REDIS_URL (e.g. redis://localhost:6379/0, needs
+# the redis package) so every worker process shares one cache and sees every
+# bump. Without it each process has its own cache, which never hears about
+# bumps made in another, so per-exam data there expires after
+# EXAM_CACHE_TIMEOUT seconds instead.
+EXAM_REDIS_URL = os.environ.get('EXAM_REDIS_URL')
+if EXAM_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': EXAM_REDIS_URL,
+        }
+    }
+    EXAM_CACHE_TIMEOUT = None
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'online-exam',
+        }
+    }
+    EXAM_CACHE_TIMEOUT = 60
+
+# Where sessions live (EXAM_SESSION_STRATEGY): "db" reads django_session on
+# every authenticated request; "cached_db" serves reads from CACHES and only
+# touches the database when a session changes or is missing from the cache;
+# "signed_cookies" keeps the session in the browser and never touches the
+# database. exam_app only stores the login in the session (messages use the
+# cookie first), so every strategy covers it.
+EXAM_SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+EXAM_SESSION_STRATEGY = os.environ.get('EXAM_SESSION_STRATEGY', 'cached_db' if SQLITE_PRODUCTION_MODE else 'db')
+if EXAM_SESSION_STRATEGY not in EXAM_SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f'EXAM_SESSION_STRATEGY must be one of {", ".join(EXAM_SESSION_ENGINES)}, not {EXAM_SESSION_STRATEGY!r}.'
+    )
+SESSION_ENGINE = EXAM_SESSION_ENGINES[EXAM_SESSION_STRATEGY]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -90,3 +146,28 @@ LOGIN_URL = 'login'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Autosaved answers are held in memory and written in batches of this many
+# rows, or after this many seconds, whichever comes first.
+EXAM_AUTOSAVE_BATCH_SIZE = 200
+EXAM_AUTOSAVE_MAX_DELAY = 2.0
+
+# When enabled, submit_exam only stores the answers and queues a GradingJob;
+# run `python manage.py grade_submissions` to score queued submissions.
+EXAM_ASYNC_GRADING = False
+
+# Admission control for exam starts: at most EXAM_ADMISSION_RATE new attempts
+# per second per exam once a burst of EXAM_ADMISSION_BURST has been let in.
+# Students over the limit wait in a polling waiting room, and their attempt
+# (and timer) starts when they are admitted. None disables it. The slot
+# counters live in CACHES, so multi-process deployments need EXAM_REDIS_URL.
+EXAM_ADMISSION_RATE = None
+EXAM_ADMISSION_BURST = 20
+
+# Per-request query count and timings are logged to "exam_app.metrics" and the
+# most recent ones kept in memory (exam_app.metrics.recent_requests).
+EXAM_METRICS_BUFFER_SIZE = 1000
+
+# Background threads that turn uploaded profile pictures into small WebP
+# thumbnails after registration.
+EXAM_THUMBNAIL_WORKERS = 2